@@ -0,0 +1,82 @@
+# app/artifacts.py
+# The most recent composites, kept in memory next to the files they were
+# saved to. Preview, print and email used to decode/read the same JPEG
+# again one after another; now they can take the rendered image or the
+# encoded bytes straight from here. Anything evicted (or rendered by another
+# process) is simply not found, and callers go back to the file path.
+from __future__ import annotations
+
+import io
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from PIL import Image
+
+from app.paths import write_bytes
+
+# current guest + the one before (still printing/emailing). An RGB 4x6
+# composite is ~25 MB in memory, so keep this small on the Pi.
+MAX_ARTIFACTS = 2
+
+_artifacts: OrderedDict[Path, CompositeArtifact] = OrderedDict()
+_lock = threading.Lock()
+
+
+class CompositeArtifact:
+    """A rendered composite: the RGB image, its encoded bytes and its path."""
+
+    def __init__(self, path: Path, image: Image.Image, data: bytes, fmt: str):
+        self.path = path
+        self.image = image
+        self.data = data
+        self.format = fmt  # Pillow format name, e.g. "JPEG"
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.image.size
+
+    @property
+    def print_ready(self) -> bool:
+        # baseline RGB JPEG; that's what save_composite writes for .jpg
+        return self.format == "JPEG" and self.image.mode in ("RGB", "L")
+
+
+def _key(path: Path | str) -> Path:
+    return Path(path).resolve()
+
+
+def save_composite(image: Image.Image, path: Path | str) -> CompositeArtifact:
+    """Encode `image` once, write the bytes to `path` and keep both in memory."""
+    path = Path(path)
+    fmt = Image.registered_extensions().get(path.suffix.lower(), "JPEG")
+    buf = io.BytesIO()
+    image.save(buf, format=fmt)
+    art = CompositeArtifact(path, image, buf.getvalue(), fmt)
+    write_bytes(path, art.data)
+
+    with _lock:
+        key = _key(path)
+        _artifacts.pop(key, None)
+        _artifacts[key] = art
+        while len(_artifacts) > MAX_ARTIFACTS:
+            _artifacts.popitem(last=False)
+    return art
+
+
+def get_artifact(path: Path | str) -> CompositeArtifact | None:
+    """The in-memory composite for `path`, or None if it has been evicted."""
+    with _lock:
+        art = _artifacts.get(_key(path))
+        if art is not None:
+            _artifacts.move_to_end(_key(path))
+        return art
+
+
+def evict(path: Path | str | None = None) -> None:
+    """Drop one artifact, or all of them when no path is given."""
+    with _lock:
+        if path is None:
+            _artifacts.clear()
+        else:
+            _artifacts.pop(_key(path), None)
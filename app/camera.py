@@ -1,9 +1,14 @@
+from collections import deque
 from pathlib import Path
 import platform
+import threading
+import time
 import numpy as np
 
 # Qt
-from PySide6.QtGui import QImage, QColor
+from PySide6.QtGui import QImage
+
+from app.encoder import save_photo
 
 # Detect whether we’re on a Raspberry Pi.. only tested on a 5
 ON_PI = platform.system() == "Linux" and "aarch64" in platform.machine()
@@ -18,40 +23,402 @@ else:
     controls = None
 
 
-class CameraManager:
+# Qt's Format_RGB32 is 0xffRRGGBB per pixel, i.e. B,G,R,X bytes in memory on
+# the Pi (little endian). libcamera calls that same layout XRGB8888, so lores
+# frames can be wrapped in a QImage as they come.
+PREVIEW_FORMAT = "XRGB8888"
+
+
+QT_FORMATS = {
+    "XRGB8888": QImage.Format_RGB32,
+    "RGBA8888": QImage.Format_RGBA8888,
+    "RGB888": QImage.Format_RGB888,
+}
+
+
+def qimage_from_array(arr, fmt):
+    """Wrap an (h, w, channels) frame in a QImage without copying it.
+
+    The QImage borrows the array's memory: keep `arr` alive while it's used.
+    """
+    h, w = arr.shape[0], arr.shape[1]
+    return QImage(arr.data, w, h, arr.strides[0], QT_FORMATS[fmt])
+
+
+def fit_size(size, box):
+    """Largest even (w, h) with the aspect of `size` that fits inside `box`."""
+    w, h = size
+    bw, bh = box
+    scale = min(bw / w, bh / h, 1.0)
+    return max(2, int(w * scale) & ~1), max(2, int(h * scale) & ~1)
+
+
+# AWB counts as settled when the colour gains of the last AWB_FRAMES frames
+# are within AWB_TOLERANCE (relative) of each other
+AWB_FRAMES = 5
+AWB_TOLERANCE = 0.02
+
+# stream mode runs the still config for the preview too: at least this many buffers
+STREAM_MIN_BUFFERS = 3
+
+
+class CameraBackend:
+    """What the app needs from a camera. Backends fill in the frame sources.
+
+    A backend provides get_preview_array() (frames for the screen, in one of
+    QT_FORMATS) and grab() (a full-size RGB PIL image). Preview sizing, the
+    QImage wrapping and capture-to-file are shared. Pick one with
+    create_camera() and [camera] backend.
+    """
+
     def __init__(self, config=None):
-        self.picam = None
-        self.preview_started = False
         self.config = config or {}
+        self.preview_started = False
+        self._frame = None  # keeps the array behind the last QImage alive
+        # {"mode", "lag_ms", "request_ns", "sensor_ns", "total_ms"} of the last shot
+        self.last_capture = None
+
+        main = self._main_size()
+        # preview stream size; the capture screen narrows it to its widget
+        box = self.config.get("preview_size", [main[0] // 2, main[1] // 2])
+        self.preview_size = fit_size(main, box)
+
+    def _main_size(self):
+        # the full-size frames the preview is scaled from
+        return tuple(self.config.get("resolution", [720, 1280]))
+
+    def set_preview_size(self, box) -> None:
+        """Size the preview stream to fit `box` (w, h), e.g. the preview widget."""
+        size = fit_size(self._main_size(), box)
+        if size != self.preview_size:
+            self.preview_size = size
+            self._preview_size_changed()
+
+    def _preview_size_changed(self) -> None:
+        pass
+
+    def start_camera(self):
+        self.preview_started = True
+
+    def get_preview_array(self):
+        """Latest preview frame as (array, format), or (None, None)."""
+        return None, None
+
+    def get_qt_preview_frame(self):
+        """Latest preview frame as a QImage.
+
+        The QImage wraps the frame array directly (no conversion or copy).
+        It is only valid until the next call, so turn it into a pixmap
+        before asking for another one.
+        """
+        arr, fmt = self.get_preview_array()
+        if arr is None:
+            return None
+        self._frame = arr
+        return qimage_from_array(arr, fmt)
+
+    def grab(self, trigger_ns=None):
+        """Take a photo into memory and return it as an RGB PIL image."""
+        raise NotImplementedError
+
+    def capture(self, filename, trigger_ns=None):
+        """grab() and save to `filename` before returning (format from the extension)."""
+        filepath = Path(filename).resolve()
+        t0 = time.perf_counter()
+        save_photo(self.grab(trigger_ns), filepath)
+        if self.last_capture is not None:
+            self.last_capture["total_ms"] = (time.perf_counter() - t0) * 1000.0
+        print(f"[capture] saved: {filepath}")
+        return filepath
+
+    def converged(self) -> bool:
+        """True once exposure, white balance and focus have settled.
+
+        Synthetic backends are always ready.
+        """
+        return True
+
+    def reset_convergence(self) -> None:
+        """Forget the frames converged() has seen (call at session start)."""
+
+    # zero shutter lag is a Picamera2 feature; elsewhere these do nothing
+    def zsl_start(self) -> None:
+        pass
+
+    def zsl_stop(self) -> None:
+        pass
+
+    def close(self):
+        self.preview_started = False
+
+
+def camera_settings(config, cameras, n):
+    """[camera] settings for camera n (0 = [camera] as is, 1/2 = [cameraN]).
+
+    [cameraN] id picks the sensor, resolution is its full-size (still)
+    resolution, anything else overrides the [camera] key of the same name.
+    Returns None if that camera is disabled or unsupported.
+    """
+    if not n:
+        return dict(config)
+    section = (cameras or {}).get(f"camera{n}") or {}
+    if not section.get("enabled", n == 1):
+        print(f"⚠️ camera{n} is not enabled")
+        return None
+    if str(section.get("type", 0)).lower() not in ("0", "pi"):
+        print(f"⚠️ camera{n}: only Pi cameras (type = 0) are supported")
+        return None
+    out = dict(config)
+    out["camera_num"] = int(section.get("id", n - 1))
+    if "resolution" in section:
+        out["capture_resolution"] = section["resolution"]
+    skip = ("enabled", "type", "id", "resolution", "rotation")
+    out.update({k: v for k, v in section.items() if k not in skip})
+    return out
+
+
+def create_camera(config=None, cameras=None) -> CameraBackend:
+    """The camera backend picked by [camera] backend.
+
+    "picamera2" is the Pi camera, "mock" a synthetic camera, "replay" plays
+    back replay_source (a folder of images or a video). "auto" (default)
+    means picamera2 on the Pi and mock everywhere else.
+
+    `cameras` is [cameras] plus the [camera1]/[camera2] sections under
+    "camera1"/"camera2". When preview and capture name different cameras
+    the result is a MultiCamera.
+    """
+    config = config or {}
+    cameras = cameras or {}
+    preview_n = int(cameras.get("preview", 0) or 0)
+    capture_n = int(cameras.get("capture", 0) or 0)
+    if preview_n == capture_n:
+        return _create_backend(camera_settings(config, cameras, preview_n) or config)
+
+    preview_cfg = camera_settings(config, cameras, preview_n)
+    capture_cfg = camera_settings(config, cameras, capture_n)
+    if preview_cfg is None or capture_cfg is None:
+        print("⚠️ Multi-camera setup incomplete, using a single camera")
+        return _create_backend(config)
+    # the preview camera only ever streams its preview config; stills come
+    # from the capture camera, so it never switches mode
+    preview_cfg["capture_mode"] = "switch"
+    preview_cfg["zsl"] = False
+    return MultiCamera(_create_backend(preview_cfg), _create_backend(capture_cfg))
+
+
+def _create_backend(config) -> CameraBackend:
+    name = str(config.get("backend", "auto")).lower()
+    if name == "auto":
+        name = "picamera2" if ON_PI else "mock"
+    if name == "picamera2":
+        return CameraManager(config)
+
+    from app.camera_backends import MockCamera, ReplayCamera
+
+    if name == "replay":
+        return ReplayCamera(config)
+    if name != "mock":
+        print(f"⚠️ Unknown camera backend {name!r}, using mock")
+    return MockCamera(config)
+
+
+class MultiCamera(CameraBackend):
+    """One camera for the live preview, another for the stills.
+
+    Both run at the same time. The preview camera keeps streaming while the
+    capture camera takes a shot against the trigger time. last_capture
+    records the sensor timestamps of the still and of the preview frame the
+    guest was looking at, and the skew between them.
+    """
+
+    def __init__(self, preview: CameraBackend, capture: CameraBackend):
+        self.preview = preview
+        self.capturer = capture
+        super().__init__(preview.config)
+        self.preview_size = preview.preview_size
+
+    def _main_size(self):
+        return self.preview._main_size()
+
+    def set_preview_size(self, box) -> None:
+        self.preview.set_preview_size(box)
+        self.preview_size = self.preview.preview_size
+
+    def start_camera(self):
+        self.preview.start_camera()
+        self.capturer.start_camera()
+        super().start_camera()
+
+    def get_preview_array(self):
+        return self.preview.get_preview_array()
+
+    def grab(self, trigger_ns=None):
+        trigger_ns = trigger_ns or time.monotonic_ns()
+        preview_ns = getattr(self.preview, "preview_ns", None)
+        img = self.capturer.grab(trigger_ns)
+        info = dict(self.capturer.last_capture or {})
+        still_ns = info.get("sensor_ns")
+        info["mode"] = f"multi/{info.get('mode', '?')}"
+        info["preview_ns"] = preview_ns
+        if still_ns and preview_ns:
+            info["skew_ms"] = (still_ns - preview_ns) / 1e6
+            print(f"[capture] multi: still is {info['skew_ms']:+.0f} ms from the preview frame")
+        self.last_capture = info
+        return img
+
+    def converged(self) -> bool:
+        return self.preview.converged() and self.capturer.converged()
+
+    def reset_convergence(self) -> None:
+        self.preview.reset_convergence()
+        self.capturer.reset_convergence()
+
+    def zsl_start(self) -> None:
+        self.capturer.zsl_start()
+
+    def zsl_stop(self) -> None:
+        self.capturer.zsl_stop()
+
+    def close(self):
+        self.capturer.close()
+        self.preview.close()
+        super().close()
+
+
+class CameraManager(CameraBackend):
+    """Picamera2 backend."""
+
+    def __init__(self, config=None):
+        self.picam = None
         self._preview_config = None
         self._still_config = None
+        self._lores = False  # preview frames come from the lores stream
+        self.preview_ns = None  # SensorTimestamp of the latest preview frame
+        self._metadata = None  # metadata of the latest frame we looked at
+        self._gains = deque(maxlen=AWB_FRAMES)  # recent ColourGains, for AWB
+
+        config = config or {}
+        # capture_mode: "switch" reconfigures to the still config per shot,
+        # "stream" runs the still config all session and grabs a frame from it
+        self.capture_mode = str(config.get("capture_mode", "switch")).lower()
+
+        # zero shutter lag (stream mode only): keep the last few full-size
+        # requests while the countdown runs and hand back the one closest to
+        # the trigger time
+        self.zsl = bool(config.get("zsl", False)) and self.capture_mode == "stream"
+        self._zsl_frames = deque()  # (SensorTimestamp ns, request), oldest first
+        self._zsl_cond = threading.Condition()
+        self._zsl_thread = None
+        self._zsl_running = False
+        self._zsl_preview = None  # latest lores array pulled by the ZSL thread
+
+        super().__init__(config)
+
+    def _main_size(self):
+        # the main stream the preview is scaled from
+        resolution = tuple(self.config.get("resolution", [720, 1280]))
+        if self.capture_mode == "stream":
+            return tuple(self.config.get("capture_resolution", resolution))
+        return resolution
+
+    def _preview_flip(self):
+        # stream mode runs the sensor with the capture flips; the preview
+        # flips that differ are done on the (small) preview frame instead
+        if self.capture_mode != "stream":
+            return False, False
+        h = bool(self.config.get("hflip", 0)) != bool(self.config.get("capture_hflip", 0))
+        v = bool(self.config.get("vflip", 0)) != bool(self.config.get("capture_vflip", 0))
+        return h, v
+
+    def _preview_size_changed(self) -> None:
+        # reconfigure a running camera for the new lores size
+        if self.picam is not None:
+            self.picam.stop()
+            self._configure_preview()
+            self.picam.start()
+
+    def zsl_depth(self) -> int:
+        """How many full-size frames fit the [camera] zsl_budget_mb."""
+        w, h = self._main_size()
+        lw, lh = self.preview_size
+        frame = w * h * 3 + lw * lh * 4  # RGB888 main + XRGB8888 lores
+        budget = float(self.config.get("zsl_budget_mb", 96)) * 1024 * 1024
+        return max(1, int(budget // frame))
+
+    def _main_stream(self, size):
+        # main_format unset = Picamera2's default for the configuration
+        main = {"size": tuple(size)}
+        fmt = self.config.get("main_format")
+        if fmt:
+            main["format"] = str(fmt)
+        return main
+
+    def _configure_preview(self):
+        if self.capture_mode == "stream":
+            # one still configuration for preview and capture: full-size main
+            # for photos, lores for the screen
+            create = self.picam.create_still_configuration
+            prefix = "capture_"
+        else:
+            create = self.picam.create_preview_configuration
+            prefix = ""
+        main = self._main_stream(self._main_size())
+        transform = Transform(
+            hflip=bool(self.config.get(prefix + "hflip", 0)),
+            vflip=bool(self.config.get(prefix + "vflip", 0)),
+        )
+        extra = {}
+        buffers = int(self.config.get("buffer_count", 0) or 0)
+        if self.capture_mode == "stream":
+            # the still config defaults to one buffer and very long frame
+            # times; the preview polls it continuously, so give it a few
+            # buffers and keep the frame rate up in dim light
+            buffers = max(buffers, STREAM_MIN_BUFFERS)
+            fps = max(1, int(self.config.get("preview_fps", 20)))
+            extra["controls"] = {"FrameDurationLimits": (100, int(1_000_000 / fps))}
+        if self.zsl:
+            # held frames are camera buffers, plus two to keep streaming
+            buffers = max(buffers, self.zsl_depth() + 2)
+        if buffers:
+            extra["buffer_count"] = buffers
+        try:
+            self._preview_config = create(
+                main=main,
+                lores={"size": self.preview_size, "format": PREVIEW_FORMAT},
+                transform=transform,
+                **extra,
+            )
+            self.picam.configure(self._preview_config)
+            self._lores = True
+        except Exception as e:
+            # older ISPs (Pi 4 and earlier) only do YUV420 on lores
+            print(f"⚠️ RGB lores preview not available, using main stream: {e}")
+            self._preview_config = create(main=main, transform=transform, **extra)
+            self.picam.configure(self._preview_config)
+            self._lores = False
 
     def start_camera(self):
         if not ON_PI:
-            print("Running in mock mode — camera not enabled.")
-            return
+            raise RuntimeError(
+                'Picamera2 is not available here; use [camera] backend = "mock" or "replay"'
+            )
 
         if self.picam is None:
-            self.picam = Picamera2()
+            self.picam = Picamera2(int(self.config.get("camera_num", 0)))
             resolution = tuple(self.config.get("resolution", [720, 1280]))
-            # Preview transforms
-            prev_hflip = bool(self.config.get("hflip", 0))
-            prev_vflip = bool(self.config.get("vflip", 0))
             # Capture transforms (default to no flip unless explicitly set)
             cap_resolution = tuple(self.config.get("capture_resolution", resolution))
             cap_hflip = bool(self.config.get("capture_hflip", 0))
             cap_vflip = bool(self.config.get("capture_vflip", 0))
 
-            self._preview_config = self.picam.create_preview_configuration(
-                main={"size": resolution},
-                transform=Transform(hflip=prev_hflip, vflip=prev_vflip),
-            )
             self._still_config = self.picam.create_still_configuration(
-                main={"size": cap_resolution},
+                main=self._main_stream(cap_resolution),
                 transform=Transform(hflip=cap_hflip, vflip=cap_vflip),
             )
 
-            self.picam.configure(self._preview_config)
+            # preview: full-size main stream plus a display-sized lores stream
+            self._configure_preview()
             self.picam.start_preview(Preview.NULL)
             self.picam.start()
             self.preview_started = True
@@ -98,85 +465,247 @@ class CameraManager:
             except Exception as e:
                 print(f"⚠️ AF control setup skipped: {e}")
 
-    def get_qt_preview_frame(self):
-        if not ON_PI:
-            # Return dummy frame (gray box) on macOS
-            dummy = QImage(720, 1280, QImage.Format_RGB32)
-            dummy.fill(QColor("darkgray"))
-            return dummy
+    def get_preview_array(self):
+        """Latest preview frame as (array, format), or (None, None).
 
+        format is a key of QT_FORMATS: "XRGB8888" for the lores stream,
+        otherwise whatever the main stream gives. No Qt involved, so the
+        camera service process can use this too.
+        """
         if self.picam is None:
-            return None
+            return None, None
 
         try:
+            if self._lores:
+                if self._zsl_running:
+                    # the ZSL thread owns the stream; use its latest frame
+                    with self._zsl_cond:
+                        arr = self._zsl_preview
+                else:
+                    request = self.picam.capture_request()
+                    try:
+                        arr = request.make_array("lores")
+                        self._note_metadata(request.get_metadata())
+                    finally:
+                        request.release()
+                if arr is None:
+                    return None, None
+                hflip, vflip = self._preview_flip()
+                if hflip or vflip:
+                    arr = np.ascontiguousarray(
+                        arr[:: -1 if vflip else 1, :: -1 if hflip else 1]
+                    )
+                return arr, PREVIEW_FORMAT
+
             arr = self.picam.capture_array("main")
             if arr is None:
-                return None
+                return None, None
 
             # Assume camera provides RGB or RGBA; do not swap channels
             if arr.ndim == 3 and arr.shape[2] >= 3:
                 if arr.shape[2] == 3:
-                    rgb = arr
-                else:  # use first 4 channels if present
-                    rgb = arr[:, :, :4]
-            else:
-                return None
-
-            rgb = np.ascontiguousarray(rgb)
-            h, w = rgb.shape[0], rgb.shape[1]
-            if rgb.shape[2] == 4:
-                return QImage(rgb.data, w, h, 4 * w, QImage.Format_RGBA8888)
-            else:
-                return QImage(rgb.data, w, h, 3 * w, QImage.Format_RGB888)
+                    return arr, "RGB888"
+                # use first 4 channels if present
+                return np.ascontiguousarray(arr[:, :, :4]), "RGBA8888"
+            return None, None
         except Exception as e:
             print(f"⚠️ Preview frame error: {e}")
-            return None
+            return None, None
 
-    def capture(self, filename):
-        filepath = Path(filename).resolve()
-        filepath.parent.mkdir(parents=True, exist_ok=True)
+    def _note_metadata(self, md: dict) -> None:
+        self._metadata = md
+        self.preview_ns = md.get("SensorTimestamp")
+        gains = md.get("ColourGains")
+        if gains:
+            self._gains.append(tuple(gains))
 
-        if not ON_PI:
-            from PIL import Image, ImageDraw
+    def converged(self) -> bool:
+        """Exposure locked, white balance steady and (for AF modes) focused.
+
+        Reads the metadata of the frames the preview is already pulling; if
+        there are none (main-stream preview), asks for one frame's worth.
+        """
+        if self.picam is None:
+            return False
+        md = self._metadata
+        if md is None or self._lores is False:
+            try:
+                md = self.picam.capture_metadata()
+                self._note_metadata(md)
+            except Exception:
+                return False
+
+        # AeLocked on older libcamera, AeState (2 = converged) on newer
+        ae = md.get("AeLocked")
+        if ae is None and "AeState" in md:
+            ae = int(md["AeState"]) == 2
+        if ae is False:
+            return False
+
+        # AWB has no lock flag here: wait for the gains to stop moving
+        if len(self._gains) == AWB_FRAMES:
+            for band in range(2):
+                vals = [g[band] for g in self._gains]
+                if max(vals) - min(vals) > AWB_TOLERANCE * max(vals):
+                    return False
+        elif "ColourGains" in md:
+            return False
+
+        mode = str(self.config.get("af_mode", "auto")).lower()
+        if mode in ("auto", "continuous") and "AfState" in md:
+            # 1 = scanning; idle/focused/failed all mean it has stopped
+            if int(md["AfState"]) == 1:
+                return False
+        return True
+
+    def reset_convergence(self) -> None:
+        # metadata from the last session can be minutes old and of another
+        # scene; converged() has to see this session's frames
+        self._metadata = None
+        self._gains.clear()
+
+    def zsl_start(self) -> None:
+        """Start buffering full-size frames (call when the countdown starts)."""
+        if not self.zsl or self._zsl_running:
+            return
+        if self.picam is None:
+            self.start_camera()
+        self._zsl_running = True
+        self._zsl_thread = threading.Thread(
+            target=self._zsl_loop, name="camera-zsl", daemon=True
+        )
+        self._zsl_thread.start()
+
+    def zsl_stop(self) -> None:
+        if not self._zsl_running:
+            return
+        self._zsl_running = False
+        self._zsl_thread.join(timeout=2)
+        self._zsl_thread = None
+        with self._zsl_cond:
+            while self._zsl_frames:
+                self._zsl_frames.popleft()[1].release()
+            self._zsl_preview = None
+
+    def _zsl_loop(self):
+        depth = self.zsl_depth()
+        while self._zsl_running:
+            try:
+                request = self.picam.capture_request()
+            except Exception as e:
+                print(f"⚠️ ZSL capture stopped: {e}")
+                self._zsl_running = False
+                break
+            # SensorTimestamp is on the same clock as time.monotonic_ns()
+            md = request.get_metadata()
+            ts = md.get("SensorTimestamp") or time.monotonic_ns()
+            lores = request.make_array("lores") if self._lores else None
+            with self._zsl_cond:
+                self._zsl_frames.append((ts, request))
+                while len(self._zsl_frames) > depth:
+                    self._zsl_frames.popleft()[1].release()
+                if lores is not None:
+                    self._zsl_preview = lores
+                    self._note_metadata(md)
+                self._zsl_cond.notify_all()
 
-            img = Image.new("RGB", (480, 640), color=(100, 100, 100))
-            ImageDraw.Draw(img).text((10, 10), "Simulated Image", fill=(255, 255, 255))
-            print(f"[capture] mock saved: {filepath}")
-            img.save(filepath)
-            return filepath
+    def _zsl_take(self, trigger_ns: int):
+        # wait (briefly) for a frame at or after the trigger so "closest" can
+        # be on either side of it, then take the nearest one out of the ring
+        with self._zsl_cond:
+            self._zsl_cond.wait_for(
+                lambda: self._zsl_frames and self._zsl_frames[-1][0] >= trigger_ns,
+                timeout=0.5,
+            )
+            if not self._zsl_frames:
+                return None, None
+            pick = min(self._zsl_frames, key=lambda f: abs(f[0] - trigger_ns))
+            self._zsl_frames.remove(pick)
+            return pick
+
+    def grab(self, trigger_ns=None):
+        """Take a photo into memory and return it as an RGB PIL image.
 
+        trigger_ns is when the shutter was "pressed" (time.monotonic_ns());
+        with ZSL running the buffered frame nearest to it is used instead of
+        exposing a new one. Saving it is up to the caller (see app.encoder).
+        """
         if not self.preview_started:
             print("[capture] preview not started → start_camera()")
             self.start_camera()
 
+        request_ns = time.monotonic_ns()
+        if self._zsl_running:
+            ts, request = self._zsl_take(trigger_ns or request_ns)
+            if request is not None:
+                try:
+                    img = request.make_image("main").convert("RGB")
+                finally:
+                    request.release()
+                # negative lag: the frame was exposed before the trigger
+                lag = (ts - trigger_ns) / 1e6 if trigger_ns else 0.0
+                self.last_capture = {
+                    "mode": "zsl",
+                    "lag_ms": lag,
+                    "request_ns": request_ns,
+                    "sensor_ns": ts,
+                }
+                print(f"[capture] zsl: frame {lag:+.0f} ms from trigger")
+                return img
+            print("⚠️ ZSL buffer empty, capturing a new frame")
+
+        t0 = time.perf_counter()
+        sensor_ns = None
+        if self.capture_mode == "stream":
+            # the still config is already running: take the next completed
+            # request, no sensor reconfiguration
+            request = self.picam.capture_request()
+            try:
+                img = request.make_image("main")
+                sensor_ns = request.get_metadata().get("SensorTimestamp")
+            finally:
+                request.release()
+        else:
+            img = self._grab_switch()
+        lag = (time.perf_counter() - t0) * 1000.0
+        self.last_capture = {
+            "mode": self.capture_mode,
+            "lag_ms": lag,
+            "request_ns": request_ns,
+            "sensor_ns": sensor_ns,  # None in switch mode (no request metadata)
+        }
+        print(f"[capture] {self.capture_mode}: shutter lag {lag:.0f} ms")
+        return img.convert("RGB")
+
+    def _grab_switch(self):
         used_switch = False
         try:
             if self._still_config is not None:
-                print("[capture] using STILL config → switch+capture:", filepath)
+                print("[capture] using STILL config → switch+capture")
                 used_switch = True
-                self.picam.switch_mode_and_capture_file(self._still_config, filepath)
+                img = self.picam.switch_mode_and_capture_image(self._still_config)
                 print("[capture] still capture ok")
             else:
-                print("[capture] no still config → capture in current mode:", filepath)
-                self.picam.capture_file(filepath)
+                print("[capture] no still config → capture in current mode")
+                img = self.picam.capture_image("main")
                 print("[capture] preview-mode capture ok")
         except Exception as e:
-            print(f"[capture] ERROR during capture: {e} → fallback capture_file")
-            self.picam.capture_file(filepath)
+            print(f"[capture] ERROR during capture: {e} → fallback capture_image")
+            img = self.picam.capture_image("main")
         finally:
             # Only try to reconfigure if we DIDN'T use the switch helper.
-            # When using switch_mode_and_capture_file, preview is already restored.
+            # When using switch_mode_and_capture_image, preview is already restored.
             if not used_switch and self._preview_config is not None:
                 try:
                     self.picam.configure(self._preview_config)
                     print("[capture] preview restored")
                 except Exception as e:
                     print(f"[capture] failed to restore preview: {e}")
-
-        return filepath
+        return img
 
     def close(self):
-        if ON_PI and self.picam:
+        self.zsl_stop()
+        if self.picam:
             self.picam.stop_preview()
             self.picam.close()
         self.picam = None
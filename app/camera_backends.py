@@ -0,0 +1,200 @@
+# app/camera_backends.py
+# Camera backends for machines without a Pi camera.
+#
+# MockCamera is the old stand-in (flat synthetic frames, instant captures).
+# ReplayCamera plays back a folder of images or a video file at a set
+# resolution and frame rate, so preview, capture and collage can be run
+# with real, full-size pictures on a dev box. Pick one with
+# [camera] backend = "mock" | "replay"; see create_camera() in app.camera.
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageOps
+
+from app.camera import PREVIEW_FORMAT, CameraBackend
+from app.config import APP_ROOT
+
+try:  # only needed to replay video files
+    import cv2
+except ImportError:
+    cv2 = None
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff"}
+
+
+def xrgb_from_pil(img: Image.Image) -> np.ndarray:
+    """RGB PIL image -> (h, w, 4) XRGB8888 (B, G, R, X bytes) array."""
+    data = img.convert("RGB").tobytes("raw", "BGRX")
+    return np.frombuffer(data, np.uint8).reshape(img.height, img.width, 4)
+
+
+class MockCamera(CameraBackend):
+    """Synthetic camera: a flat gradient preview and a plain grey capture."""
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self._mock_frame = None
+
+    def _preview_size_changed(self) -> None:
+        self._mock_frame = None
+
+    def start_camera(self):
+        print("Running in mock mode — camera not enabled.")
+        super().start_camera()
+
+    def get_preview_array(self):
+        # synthetic stand-in for the lores stream: same size, same format
+        if self._mock_frame is None:
+            w, h = self.preview_size
+            x = np.linspace(60, 160, w, dtype=np.uint32)[None, :]
+            y = np.linspace(40, 120, h, dtype=np.uint32)[:, None]
+            px = 0xFF000000 | (x << 16) | ((x + y) // 2 << 8) | y
+            self._mock_frame = px.astype("<u4").view(np.uint8).reshape(h, w, 4)
+        return self._mock_frame, PREVIEW_FORMAT
+
+    def grab(self, trigger_ns=None):
+        request_ns = time.monotonic_ns()
+        t0 = time.perf_counter()
+        img = Image.new("RGB", (480, 640), color=(100, 100, 100))
+        ImageDraw.Draw(img).text((10, 10), "Simulated Image", fill=(255, 255, 255))
+        ms = (time.perf_counter() - t0) * 1000.0
+        self.last_capture = {"mode": "mock", "lag_ms": ms, "request_ns": request_ns}
+        return img
+
+
+class ReplayCamera(CameraBackend):
+    """Plays back replay_source as if it were the camera.
+
+    [camera] settings:
+      replay_source      folder of images (played in name order) or a video
+      replay_resolution  full-size frame size, default capture_resolution
+      replay_fps         playback rate, default 30
+      replay_clock       "realtime" (frame follows the wall clock) or "step"
+                         (every preview call moves one frame on, so a run is
+                         the same frames every time)
+
+    Frames are cover-fitted to replay_resolution; the preview is that frame
+    scaled to the preview size. Video needs OpenCV (cv2).
+    """
+
+    CACHE_FRAMES = 16  # decoded preview frames kept around (folder source)
+
+    def __init__(self, config=None):
+        config = config or {}
+        resolution = config.get("resolution", [720, 1280])
+        self.resolution = tuple(
+            config.get("replay_resolution", config.get("capture_resolution", resolution))
+        )
+        super().__init__(config)
+        self.fps = float(self.config.get("replay_fps", 30))
+        self.step = str(self.config.get("replay_clock", "realtime")).lower() == "step"
+
+        src = Path(str(self.config.get("replay_source", "")))
+        if not src.is_absolute():
+            src = APP_ROOT / src
+        self.source = src
+        self._files: list[Path] = []
+        self._video = None
+        self._video_index = -1  # frame the video is positioned after
+        self._video_frame = None  # last decoded video frame (RGB PIL)
+        self._previews: OrderedDict[int, np.ndarray] = OrderedDict()
+        self._t0 = None
+        self._index = 0
+
+        if src.is_dir():
+            self._files = sorted(p for p in src.iterdir() if p.suffix.lower() in IMAGE_EXTS)
+            self.frame_count = len(self._files)
+        elif src.is_file():
+            if cv2 is None:
+                raise RuntimeError("replaying a video needs OpenCV (pip install opencv-python)")
+            self._video = cv2.VideoCapture(str(src))
+            self.frame_count = int(self._video.get(cv2.CAP_PROP_FRAME_COUNT)) or 1
+        else:
+            raise RuntimeError(f"replay_source not found: {src}")
+        if self.frame_count == 0:
+            raise RuntimeError(f"no images to replay in {src}")
+
+    def _main_size(self):
+        return self.resolution
+
+    def _preview_size_changed(self) -> None:
+        self._previews.clear()
+
+    def start_camera(self):
+        if self._t0 is None:
+            self._t0 = time.monotonic()
+            print(f"Replaying {self.source} ({self.frame_count} frames @ {self.fps:g} fps)")
+        super().start_camera()
+
+    def _current_index(self) -> int:
+        if self.step:
+            return self._index % self.frame_count
+        elapsed = time.monotonic() - (self._t0 or time.monotonic())
+        return int(elapsed * self.fps) % self.frame_count
+
+    def _full_frame(self, index: int, draft: tuple[int, int] | None = None) -> Image.Image:
+        """Frame `index` cover-fitted to `draft` or the full replay resolution."""
+        size = draft or self.resolution
+        if self._video is not None:
+            img = self._video_at(index)
+        else:
+            img = Image.open(self._files[index])
+            if img.format == "JPEG":
+                img.draft("RGB", size)
+            img = img.convert("RGB")
+        return ImageOps.fit(img, size, Image.BILINEAR if draft else Image.LANCZOS)
+
+    def _video_at(self, index: int) -> Image.Image:
+        if index != self._video_index:
+            if index != self._video_index + 1:
+                self._video.set(cv2.CAP_PROP_POS_FRAMES, index)
+            ok, bgr = self._video.read()
+            if not ok:  # ran off the end (frame count is only a hint)
+                self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ok, bgr = self._video.read()
+                index = 0
+            if not ok:
+                raise RuntimeError(f"could not read a frame from {self.source}")
+            self._video_frame = Image.fromarray(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+            self._video_index = index
+        return self._video_frame
+
+    def get_preview_array(self):
+        if self._t0 is None:
+            return None, None
+        index = self._current_index()
+        if self.step:
+            self._index += 1
+        arr = self._previews.get(index)
+        if arr is None:
+            try:
+                arr = xrgb_from_pil(self._full_frame(index, self.preview_size))
+            except Exception as e:
+                print(f"⚠️ Replay frame error: {e}")
+                return None, None
+            self._previews[index] = arr
+            while len(self._previews) > self.CACHE_FRAMES:
+                self._previews.popitem(last=False)
+        else:
+            self._previews.move_to_end(index)
+        return arr, PREVIEW_FORMAT
+
+    def grab(self, trigger_ns=None):
+        if self._t0 is None:
+            self.start_camera()
+        request_ns = time.monotonic_ns()
+        t0 = time.perf_counter()
+        img = self._full_frame(self._current_index())
+        ms = (time.perf_counter() - t0) * 1000.0
+        self.last_capture = {"mode": "replay", "lag_ms": ms, "request_ns": request_ns}
+        return img
+
+    def close(self):
+        if self._video is not None:
+            self._video.release()
+            self._video = None
+        super().close()
@@ -0,0 +1,398 @@
+# app/camera_service.py
+# Runs the camera backend in its own process so Picamera2, NumPy and capture
+# encoding stop fighting the Qt UI for the GIL.
+#
+# Preview frames go through a small shared-memory ring: the service writes
+# each frame into the next slot and stamps it with a sequence number, the UI
+# wraps the newest slot in a QImage without copying it. Commands (start,
+# preview size, grab/capture, ZSL start/stop, stop) go over a multiprocessing
+# Pipe and are answered one at a time.
+#
+# Shots are encoded and saved on the service's own encode queue. Only a copy
+# reduced for the collage slot comes back with the reply; a second, one-way
+# pipe tells the UI when each file is on disk.
+#
+# Enable with [camera] service = true. CameraClient has the same methods
+# the screens use on a camera backend, so nothing else needs to know.
+from __future__ import annotations
+
+import atexit
+import multiprocessing as mp
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from app.camera import QT_FORMATS, create_camera, fit_size, qimage_from_array
+from app.collage import shrink_shot
+from app.collage_filters import REDUCED_INFO
+from app.encoder import encode_queue
+
+FORMATS = list(QT_FORMATS)  # format names by index, for the slot headers
+
+RING_SLOTS = 4
+_HEADER = 64  # latest seq (u64) + padding
+_SLOT_HEADER = 32  # seq (u64), w, h, stride, format (u32 each) + padding
+
+
+class FrameRing:
+    """Fixed-size preview frames in shared memory, newest wins.
+
+    A slot's seq is zeroed while it's being written, so a reader never picks
+    up a half-written frame as the latest one. Readers don't lock anything;
+    with RING_SLOTS slots the writer would have to lap the ring while the UI
+    is turning one frame into a pixmap before a slot it's using is reused.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int, owner: bool):
+        self.shm = shm
+        self.capacity = capacity  # bytes of pixel data per slot
+        self.owner = owner
+        buf = shm.buf
+        self._latest = np.ndarray((1,), np.uint64, buf, 0)
+        self._slots = []
+        for i in range(RING_SLOTS):
+            off = _HEADER + i * (_SLOT_HEADER + capacity)
+            self._slots.append(
+                (
+                    np.ndarray((1,), np.uint64, buf, off),
+                    np.ndarray((4,), np.uint32, buf, off + 8),
+                    np.ndarray((capacity,), np.uint8, buf, off + _SLOT_HEADER),
+                )
+            )
+
+    @staticmethod
+    def _size(capacity: int) -> int:
+        return _HEADER + RING_SLOTS * (_SLOT_HEADER + capacity)
+
+    @classmethod
+    def create(cls, capacity: int) -> FrameRing:
+        shm = shared_memory.SharedMemory(create=True, size=cls._size(capacity))
+        ring = cls(shm, capacity, owner=True)
+        ring._latest[0] = 0
+        for seq, _, _ in ring._slots:
+            seq[0] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name: str, capacity: int) -> FrameRing:
+        return cls(shared_memory.SharedMemory(name=name), capacity, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def latest(self) -> int:
+        return int(self._latest[0])
+
+    def write(self, arr: np.ndarray, fmt: str) -> int:
+        """Copy one frame into the next slot; returns its sequence number."""
+        h, w = arr.shape[0], arr.shape[1]
+        stride = w * arr.shape[2]
+        if h * stride > self.capacity:
+            raise ValueError(f"frame {w}x{h} does not fit the preview ring")
+        seq = self.latest + 1
+        slot_seq, info, data = self._slots[seq % RING_SLOTS]
+        slot_seq[0] = 0
+        data[: h * stride].reshape(h, w, arr.shape[2])[:] = arr
+        info[:] = (w, h, stride, FORMATS.index(fmt))
+        slot_seq[0] = seq
+        self._latest[0] = seq
+        return seq
+
+    def read(self, seq: int):
+        """(array view, format) of frame `seq`, or (None, None) if it's gone."""
+        slot_seq, info, data = self._slots[seq % RING_SLOTS]
+        if int(slot_seq[0]) != seq:
+            return None, None
+        w, h, stride, fmt = (int(v) for v in info)
+        arr = data[: h * stride].reshape(h, w, stride // w)
+        return arr, FORMATS[fmt]
+
+    def close(self) -> None:
+        # numpy views hold the buffer; drop them before closing the mapping
+        self._latest = None
+        self._slots = []
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _frame_capacity(camera) -> int:
+    # the preview stream never gets bigger than the main stream
+    w, h = fit_size(camera._main_size(), (1 << 16, 1 << 16))
+    return w * h * 4
+
+
+def _report_saved(events, lock: threading.Lock, path: str, fut) -> None:
+    # runs on the service's encoder thread right after the save
+    err = fut.exception()
+    try:
+        with lock:
+            events.send((path, None if err is None else f"{type(err).__name__}: {err}"))
+    except (OSError, EOFError):
+        pass  # UI side already gone
+
+
+def serve(
+    config: dict, cameras: dict | None, ring_name: str, capacity: int, conn, events
+) -> None:
+    """Camera service main loop (runs in the child process)."""
+    camera = create_camera(config, cameras)
+    events_lock = threading.Lock()
+    ring = FrameRing.attach(ring_name, capacity)
+    period = 1.0 / max(1, int(config.get("preview_fps", 20)))
+    streaming = False
+    next_frame = time.monotonic()
+
+    try:
+        while True:
+            timeout = max(0.0, next_frame - time.monotonic()) if streaming else None
+            if conn.poll(timeout):
+                cmd, *args = conn.recv()
+                if cmd == "stop":
+                    conn.send(("ok", None))
+                    break
+                try:
+                    if cmd == "start":
+                        camera.start_camera()
+                        streaming = True
+                        result = None
+                    elif cmd == "preview_size":
+                        camera.set_preview_size(args[0])
+                        result = camera.preview_size
+                    elif cmd == "capture":
+                        result = (str(camera.capture(*args)), camera.last_capture)
+                    elif cmd == "grab":
+                        # raw RGB over the pipe; the UI process encodes it
+                        img = camera.grab(*args)
+                        result = (img.size, img.tobytes(), camera.last_capture)
+                    elif cmd == "shoot":
+                        # encoded and saved here; the UI only gets the slot-sized copy
+                        path, trigger_ns, keep_size = args
+                        img = camera.grab(trigger_ns)
+                        fut = encode_queue().submit(img, path)
+                        fut.add_done_callback(partial(_report_saved, events, events_lock, path))
+                        small = shrink_shot(img, keep_size)
+                        result = (img.size, small.size, small.tobytes(), camera.last_capture)
+                    elif cmd == "converged":
+                        result = camera.converged()
+                    elif cmd == "reset_convergence":
+                        result = camera.reset_convergence()
+                    elif cmd == "zsl_start":
+                        result = camera.zsl_start()
+                    elif cmd == "zsl_stop":
+                        result = camera.zsl_stop()
+                    else:
+                        raise ValueError(f"unknown camera command {cmd!r}")
+                    conn.send(("ok", result))
+                except Exception as e:
+                    conn.send(("error", f"{type(e).__name__}: {e}"))
+                continue
+
+            next_frame += period
+            if next_frame < time.monotonic():  # fell behind (capture etc.)
+                next_frame = time.monotonic() + period
+            arr, fmt = camera.get_preview_array()
+            if arr is None:
+                continue
+            if fmt != "RGB888":
+                ring.write(arr, fmt)
+            else:
+                # keep slots at 4 bytes/pixel so they line up with lores
+                rgba = np.empty(arr.shape[:2] + (4,), np.uint8)
+                rgba[..., :3] = arr
+                rgba[..., 3] = 255
+                ring.write(rgba, "RGBA8888")
+    finally:
+        encode_queue().flush()
+        camera.close()
+        ring.close()
+        events.close()
+
+
+class CameraClient:
+    """Camera backend lookalike that drives the camera service process."""
+
+    def __init__(self, config=None, cameras=None):
+        self.config = config or {}
+        self.cameras = cameras or {}
+        self.preview_started = False
+        # sizes from a backend that's never started (closed again so a
+        # replayed video isn't left open); the service makes its own
+        probe = create_camera(self.config, self.cameras)
+        self.preview_size = probe.preview_size
+        self._capacity = _frame_capacity(probe)
+        probe.close()
+        self.last_capture = None  # as reported by the service
+        self._ring: FrameRing | None = None
+        self._conn = None
+        self._events = None  # "file saved" notes from the service
+        self._proc = None
+        self._lock = threading.Lock()  # one command/reply at a time
+        self._saving: dict[str, Future] = {}  # path -> done once the service wrote it
+        self._saving_lock = threading.Lock()
+        self._seq = 0  # last frame handed to the UI
+        atexit.register(self.close)
+
+    def _spawn(self) -> None:
+        if self._proc is not None and self._proc.is_alive():
+            return
+        # spawn, not fork: libcamera and Qt don't survive a fork
+        ctx = mp.get_context("spawn")
+        if self._proc is not None:
+            # the service died: let go of what the last one had
+            print("⚠️ Camera service stopped, restarting it")
+            self._proc = None
+            self._release_pipes_and_ring()
+        self._ring = FrameRing.create(self._capacity)
+        self._seq = 0
+        self._conn, child = ctx.Pipe()
+        self._events, child_events = ctx.Pipe(duplex=False)
+        self._proc = ctx.Process(
+            target=serve,
+            args=(
+                self.config, self.cameras, self._ring.name, self._capacity, child, child_events
+            ),
+            name="camera-service",
+            daemon=True,
+        )
+        self._proc.start()
+        child.close()
+        child_events.close()
+        threading.Thread(
+            target=self._listen, args=(self._events,), name="camera-saved", daemon=True
+        ).start()
+
+    def _listen(self, events) -> None:
+        # resolves grab_and_save() futures as the service reports its saves
+        while True:
+            try:
+                path, err = events.recv()
+            except (EOFError, OSError):
+                break
+            with self._saving_lock:
+                fut = self._saving.pop(path, None)
+            if fut is None:
+                continue
+            if err is None:
+                fut.set_result(Path(path))
+            else:
+                fut.set_exception(RuntimeError(f"camera service: {err}"))
+        # service gone: nothing more is coming for the rest
+        with self._saving_lock:
+            left, self._saving = self._saving, {}
+        for fut in left.values():
+            fut.set_exception(RuntimeError("camera service stopped before saving"))
+
+    def _call(self, cmd: str, *args):
+        with self._lock:
+            self._spawn()
+            try:
+                self._conn.send((cmd, *args))
+                status, result = self._conn.recv()
+            except (EOFError, OSError) as e:
+                # died mid-command; the next call starts a new one
+                raise RuntimeError("camera service stopped") from e
+        if status != "ok":
+            raise RuntimeError(f"camera service: {result}")
+        return result
+
+    def start_camera(self):
+        self._call("start")
+        self.preview_started = True
+
+    def set_preview_size(self, box) -> None:
+        self.preview_size = tuple(self._call("preview_size", tuple(box)))
+
+    def get_qt_preview_frame(self):
+        """QImage over the newest frame in shared memory, or None if no new one.
+
+        Like CameraManager's frame, it's only good until it's been turned
+        into a pixmap.
+        """
+        if self._ring is None:
+            return None
+        seq = self._ring.latest
+        if seq == self._seq:
+            return None
+        arr, fmt = self._ring.read(seq)
+        if arr is None:
+            return None
+        self._seq = seq
+        return qimage_from_array(arr, fmt)
+
+    def converged(self) -> bool:
+        return bool(self._call("converged"))
+
+    def reset_convergence(self) -> None:
+        self._call("reset_convergence")
+
+    def zsl_start(self) -> None:
+        self._call("zsl_start")
+
+    def zsl_stop(self) -> None:
+        self._call("zsl_stop")
+
+    def grab(self, trigger_ns=None):
+        size, data, self.last_capture = self._call("grab", trigger_ns)
+        return Image.frombytes("RGB", size, data)
+
+    def grab_and_save(self, path, trigger_ns=None, keep_size=None):
+        """Take a shot and have the service encode and save it to `path`.
+
+        Returns (image, size, future): the shot reduced for a `keep_size`
+        slot (see shrink_shot), its full size, and a Future that's done once
+        the file is written.
+        """
+        key = str(path)
+        fut = Future()
+        with self._saving_lock:
+            self._saving[key] = fut  # before asking: the save can beat the reply
+        try:
+            size, small_size, data, self.last_capture = self._call(
+                "shoot", key, trigger_ns, keep_size
+            )
+        except BaseException:
+            with self._saving_lock:
+                self._saving.pop(key, None)
+            raise
+        img = Image.frombytes("RGB", small_size, data)
+        img.info[REDUCED_INFO] = size[0] / small_size[0]  # shrink_shot's, lost on the way
+        return img, tuple(size), fut
+
+    def capture(self, filename, trigger_ns=None):
+        # CLOCK_MONOTONIC is system wide, so trigger_ns (and the *_ns stamps
+        # in last_capture) mean the same on both sides
+        path, self.last_capture = self._call("capture", str(filename), trigger_ns)
+        return Path(path)
+
+    def close(self):
+        if self._proc is not None:
+            try:
+                if self._proc.is_alive():
+                    self._call("stop")
+                self._proc.join(timeout=3)
+            except (OSError, EOFError, RuntimeError) as e:
+                print(f"⚠️ Camera service did not stop cleanly: {e}")
+            if self._proc.is_alive():
+                self._proc.terminate()
+            self._proc = None
+        self._release_pipes_and_ring()
+        self.preview_started = False
+
+    def _release_pipes_and_ring(self) -> None:
+        # the ring is ours: closing it unlinks the shared memory
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+        for conn in (self._conn, self._events):
+            if conn is not None:
+                conn.close()
+        self._conn = self._events = None
@@ -0,0 +1,219 @@
+# app/capture_queue.py
+# One long-lived capture thread for the whole app.
+#
+# Screens queue commands on it (a shot, a burst of shots, a camera call like
+# zsl_stop) and get the `done` signal back on the UI thread when each one
+# has run. It's made once in AppController, so a shot is a queue put
+# instead of a QThread start/quit/wait/deleteLater. Commands run in order,
+# which also keeps camera calls from overlapping a grab, and a burst is just
+# several shots queued back to back.
+from __future__ import annotations
+
+import itertools
+import queue
+import threading
+import time
+from functools import partial
+from pathlib import Path
+
+from PySide6.QtCore import QObject, Signal
+
+from app.encoder import encode_queue
+from app.timing import ShotTrace
+
+
+class CaptureJob:
+    """One queued command and what came of it."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, kind: str, **fields):
+        self.id = next(self._ids)
+        self.kind = kind  # "shot" | "call"
+        self.path: Path | None = fields.get("path")
+        self.trigger_ns: int | None = fields.get("trigger_ns")  # when the shutter was "pressed"
+        self.trace: ShotTrace | None = fields.get("trace")
+        self.trace_path: Path | None = fields.get("trace_path")
+        self.name: str | None = fields.get("name")  # camera method, for "call"
+        self.args: tuple = fields.get("args", ())
+        self.keep_size: tuple[int, int] | None = fields.get("keep_size")  # collage slot size
+        self.burst: list[CaptureJob] | None = None  # every job of the burst this is in
+        self.image = None  # the grabbed shot, for the collage
+        self.size: tuple[int, int] | None = None  # full size of the shot
+        self.result = None  # return value of a "call"
+        self.error: Exception | None = None
+        self.queued_ns = time.monotonic_ns()
+        self.started_ns: int | None = None
+        self.grabbed_ns: int | None = None  # shot in memory
+        self.done_ns: int | None = None
+
+    @property
+    def wait_ms(self) -> float:
+        """Queued to started: behind other commands, or a paced burst's turn."""
+        return (self.started_ns - self.queued_ns) / 1e6 if self.started_ns else 0.0
+
+    @property
+    def run_ms(self) -> float:
+        if self.started_ns is None or self.done_ns is None:
+            return 0.0
+        return (self.done_ns - self.started_ns) / 1e6
+
+    @property
+    def capture_ms(self) -> float | None:
+        """Trigger (or queued, if there was none) to the shot in memory."""
+        if self.grabbed_ns is None:
+            return None
+        return (self.grabbed_ns - (self.trigger_ns or self.queued_ns)) / 1e6
+
+    @property
+    def latency_ms(self) -> float:
+        """Queued to done."""
+        return (self.done_ns - self.queued_ns) / 1e6 if self.done_ns else 0.0
+
+    def label(self) -> str:
+        if self.kind == "call":
+            return f"camera.{self.name}"
+        if self.burst:
+            return f"shot {self.burst.index(self) + 1}/{len(self.burst)}"
+        return "shot"
+
+
+class CaptureService(QObject):
+    """Runs capture commands on one thread that lives as long as the app."""
+
+    done = Signal(object)  # CaptureJob, after every command
+    burst_done = Signal(list)  # [CaptureJob], after the last shot of a burst
+
+    def __init__(self, camera, parent=None):
+        super().__init__(parent)
+        self.camera = camera
+        self.stats: dict[str, dict] = {}  # kind -> count / total_ms / max_ms
+        self._queue: queue.Queue[CaptureJob | None] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="capture", daemon=True)
+        self._thread.start()
+
+    def shot(
+        self, path, trigger_ns=None, trace=None, trace_path=None, keep_size=None
+    ) -> CaptureJob:
+        """Queue one photo: grab to memory, then hand it to the encode queue.
+
+        keep_size is the collage slot the shot goes in; the camera service
+        only sends back a copy reduced for it (see shrink_shot).
+        """
+        job = CaptureJob(
+            "shot",
+            path=Path(path),
+            trigger_ns=trigger_ns,
+            trace=trace,
+            trace_path=trace_path,
+            keep_size=keep_size,
+        )
+        self._queue.put(job)
+        return job
+
+    def burst(self, paths, trigger_ns=None, interval: float = 0.0) -> list[CaptureJob]:
+        """Queue one shot per path, back to back.
+
+        With an interval (seconds) shot n is taken at trigger + n * interval,
+        otherwise each one goes as soon as the one before is grabbed.
+        """
+        trigger_ns = trigger_ns or time.monotonic_ns()
+        step = int(interval * 1e9)
+        jobs = [
+            CaptureJob("shot", path=Path(p), trigger_ns=trigger_ns + i * step if step else None)
+            for i, p in enumerate(paths)
+        ]
+        if jobs:
+            jobs[0].trigger_ns = trigger_ns
+        for job in jobs:
+            job.burst = jobs
+            self._queue.put(job)
+        return jobs
+
+    def call(self, name: str, *args) -> CaptureJob:
+        """Queue camera.<name>(*args), run in turn with the shots."""
+        job = CaptureJob("call", name=name, args=args)
+        self._queue.put(job)
+        return job
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Finish what's queued, then end the thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            if job.kind == "shot" and job.trigger_ns is not None:
+                # paced burst: wait for this shot's turn (counts as waiting)
+                ahead = (job.trigger_ns - time.monotonic_ns()) / 1e9
+                if ahead > 0:
+                    time.sleep(ahead)
+            job.started_ns = time.monotonic_ns()
+            try:
+                if job.kind == "shot":
+                    self._shot(job)
+                else:
+                    job.result = getattr(self.camera, job.name)(*job.args)
+            except Exception as e:
+                job.error = e
+            job.done_ns = time.monotonic_ns()
+            self._note(job)
+            self.done.emit(job)
+            if job.burst and job is job.burst[-1]:
+                self.burst_done.emit(job.burst)
+
+    def _shot(self, job: CaptureJob) -> None:
+        grab_and_save = getattr(self.camera, "grab_and_save", None)
+        if grab_and_save is not None:
+            # camera service: encoded and saved in its process, only the
+            # slot-sized copy comes back over the pipe
+            job.image, job.size, fut = grab_and_save(job.path, job.trigger_ns, job.keep_size)
+            job.grabbed_ns = time.monotonic_ns()
+            if job.trace is not None:
+                self._trace_grab(job.trace)
+        else:
+            job.image = self.camera.grab(trigger_ns=job.trigger_ns)
+            job.grabbed_ns = time.monotonic_ns()
+            job.size = job.image.size
+            if job.trace is not None:
+                self._trace_grab(job.trace)
+            fut = encode_queue().submit(job.image, job.path)
+        if job.trace is not None:
+            fut.add_done_callback(partial(_write_trace, job.trace, job.trace_path))
+
+    def _trace_grab(self, trace: ShotTrace) -> None:
+        trace.mark("frame_grabbed")
+        info = getattr(self.camera, "last_capture", None) or {}
+        for event, key in (("request_issued", "request_ns"), ("sensor_exposure", "sensor_ns")):
+            if info.get(key):
+                trace.mark(event, info[key])
+        trace.fields["mode"] = info.get("mode")
+
+    def _note(self, job: CaptureJob) -> None:
+        s = self.stats.setdefault(job.kind, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        s["count"] += 1
+        s["total_ms"] += job.latency_ms
+        s["max_ms"] = max(s["max_ms"], job.latency_ms)
+        if job.error is not None:
+            print(f"⚠️ {job.label()} failed: {job.error}")
+        print(
+            f"[capture] #{job.id} {job.label()}: waited {job.wait_ms:.0f} ms, "
+            f"ran {job.run_ms:.0f} ms"
+        )
+
+
+def _write_trace(trace: ShotTrace, path: Path, fut) -> None:
+    # runs on the encoder thread right after the save
+    if fut.exception() is None:
+        trace.mark("file_written")
+    try:
+        trace.write_jsonl(path)
+    except OSError as e:
+        print(f"⚠️ Could not write shutter trace: {e}")
@@ -2,37 +2,55 @@
 from __future__ import annotations
 
 import re
+from concurrent.futures import Future
 from pathlib import Path
 from typing import List, Optional
 
 from PIL import Image, ImageDraw
 
-from app.collage_renderer import render_collage
-from app.config import EVENT_LOADED, TEMPLATE_PATH
+from app.collage_filters import REDUCED_INFO
+from app.collage_renderer import load_template, prepare_slot, render_collage, slot_pool
+from app.config import COLLAGE_CONFIG, EVENT_LOADED, TEMPLATE_PATH
+from app.encoder import encode_queue
+from app.timing import Timeline, span
 
 
-def generate_collage(
-    photo_paths: List[Path] | List[str],
-    output_path: Path | str,
-    logo_path: Optional[Path | str] = None,
-    config: Optional[dict] = None,
-) -> Path:
-    # Prefer template, fallback to standard render otherwise
-    photo_paths = [Path(p) for p in photo_paths]
-    output_path = Path(output_path)
-    logo_path = Path(logo_path) if logo_path else None
+def open_shot(path: Path | str, size: tuple[int, int] | None = None) -> Image.Image:
+    """Open a raw shot as RGB, decoding JPEGs no larger than `size` needs.
 
-    if len(photo_paths) != 3:
-        raise ValueError(f"🛑 Expected exactly 3 photo paths, got {len(photo_paths)}")
+    The JPEG decoder can scale by 1/2, 1/4 or 1/8 while decoding; draft()
+    picks the smallest of those that still covers `size` in both directions,
+    so the slot's cover-fit only ever scales down. The factor goes in
+    img.info[REDUCED_INFO] so sharpen/blur can scale their radius to match.
+    """
+    img = Image.open(path)
+    full_width = img.width
+    if size is not None and img.format == "JPEG":
+        img.draft("RGB", size)
+    out = img.convert("RGB")
+    out.info[REDUCED_INFO] = full_width / out.width
+    return out
 
-    tpl = TEMPLATE_PATH
 
-    shots = {
-        "shot1": Image.open(photo_paths[0]).convert("RGB"),
-        "shot2": Image.open(photo_paths[1]).convert("RGB"),
-        "shot3": Image.open(photo_paths[2]).convert("RGB"),
-    }
+def shrink_shot(img: Image.Image, size: tuple[int, int] | None) -> Image.Image:
+    """open_shot()'s reduced decode for a shot that's already in memory.
 
+    Same rule as draft(): the biggest of 1/2, 1/4 or 1/8 that still covers
+    `size` in both directions, done with Image.reduce() (box average), and
+    the factor recorded in img.info[REDUCED_INFO] the same way.
+    """
+    if size is None:
+        return img
+    scale = min(img.width // max(1, size[0]), img.height // max(1, size[1]))
+    for factor in (8, 4, 2):
+        if scale >= factor:
+            out = img.reduce(factor)
+            out.info[REDUCED_INFO] = img.info.get(REDUCED_INFO, 1) * factor
+            return out
+    return img
+
+
+def session_variables(photo_paths: list[Path], config: Optional[dict] = None) -> dict:
     # EVENT_NAME from EVENT_LOADED folder name if available
     if EVENT_LOADED:
         event_name = Path(EVENT_LOADED).name
@@ -40,20 +58,134 @@ def generate_collage(
         event_name = (config or {}).get("event_name", "Event")
 
     # SESSION_ID from photo filename prefix (e.g., "0007-01.jpg" -> "0007")
-    m = re.match(r"^(\d{4})-", photo_paths[0].name)
+    m = re.match(r"^(\d{4})-", photo_paths[0].name) if photo_paths else None
     session_id = m.group(1) if m else (config or {}).get("session_id", "0000")
 
-    variables = {
+    return {
         "EVENT_NAME": event_name,
         "SESSION_ID": session_id,
         # placeholders for now... may add to settings
     }
 
-    # Ensure output directory exists
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    render_collage(str(tpl), shots, variables, str(output_path))
-    print(f"✅ Collage saved (template): {output_path}")
-    return output_path
+
+class IncrementalCollage:
+    """Builds one session's collage a shot at a time.
+
+    add_shot() decodes the raw and prepares its slot(s) on the collage
+    worker pool right away, so that work overlaps the next countdown.
+    After the last shot, finish() only has that slot plus the final
+    composite and encode left to do.
+
+    With [collage] timing = true every stage is timed and finish() appends
+    the records, tagged with the session ID, to timing_log in the event
+    folder.
+    """
+
+    def __init__(
+        self,
+        template_path: Path | str = TEMPLATE_PATH,
+        timeline: Timeline | None = None,
+    ):
+        self.template_path = Path(template_path)
+        self.template = load_template(self.template_path)
+        if timeline is None and COLLAGE_CONFIG.get("timing", False):
+            timeline = Timeline()
+        self.timeline = timeline
+        self.photo_paths: list[Path] = []
+        self._jobs: dict[str, Future] = {}  # shot name -> (image, {layer index: slot})
+
+    def _prepare(self, name: str, path: Path, image: Image.Image | None = None):
+        if image is None:
+            # shot may still be in the encoder queue
+            encode_queue().wait(path)
+            with span(self.timeline, "decode", name=name):
+                img = open_shot(path, self.template.slot_size(name))
+        else:
+            with span(self.timeline, "reduce", name=name):
+                img = shrink_shot(image, self.template.slot_size(name))
+        slots = {
+            i: prepare_slot(layer, img, self.timeline)
+            for i, layer in enumerate(self.template.layers)
+            if layer["type"] == "image_slot" and layer["name"] == name
+        }
+        return img, slots
+
+    def next_slot_size(self) -> tuple[int, int] | None:
+        """Slot size the next add_shot() is reduced to (None: no slot, kept as is)."""
+        return self.template.slot_size(f"shot{len(self.photo_paths) + 1}")
+
+    def add_shot(self, photo_path: Path | str, image: Image.Image | None = None) -> None:
+        """Queue a shot. Pass the grabbed `image` to skip reading the file back."""
+        path = Path(photo_path)
+        self.photo_paths.append(path)
+        name = f"shot{len(self.photo_paths)}"
+        self._jobs[name] = slot_pool().submit(self._prepare, name, path, image)
+
+    def finish(self, output_path: Path | str, config: Optional[dict] = None) -> Path:
+        output_path = Path(output_path)
+        shots: dict[str, Image.Image] = {}
+        prepared: dict[int, dict] = {}
+        for name, job in self._jobs.items():
+            try:
+                img, slots = job.result()
+            except Exception as e:
+                print(f"⚠️ Could not prepare {name}: {e}")
+                continue
+            shots[name] = img
+            prepared.update(slots)
+
+        # template edited mid-session: the prepared slots no longer line up
+        if load_template(self.template_path) is not self.template:
+            prepared = {}
+
+        variables = session_variables(self.photo_paths, config)
+
+        # Ensure output directory exists
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        render_collage(
+            str(self.template_path),
+            shots,
+            variables,
+            str(output_path),
+            prepared,
+            timeline=self.timeline,
+        )
+        print(f"✅ Collage saved (template): {output_path}")
+        self._write_timing(variables["SESSION_ID"])
+        return output_path
+
+    def _write_timing(self, session_id: str) -> None:
+        if self.timeline is None:
+            return
+        log = EVENT_LOADED / COLLAGE_CONFIG.get("timing_log", "collage_timing.jsonl")
+        try:
+            self.timeline.write_jsonl(
+                log,
+                session_id=session_id,
+                template=self.template_path.parent.name,
+            )
+        except OSError as e:
+            print(f"⚠️ Could not write collage timing log {log}: {e}")
+
+
+def generate_collage(
+    photo_paths: List[Path] | List[str],
+    output_path: Path | str,
+    logo_path: Optional[Path | str] = None,
+    config: Optional[dict] = None,
+) -> Path:
+    # Prefer template, fallback to standard render otherwise
+    photo_paths = [Path(p) for p in photo_paths]
+    output_path = Path(output_path)
+    logo_path = Path(logo_path) if logo_path else None
+
+    if len(photo_paths) != 3:
+        raise ValueError(f"🛑 Expected exactly 3 photo paths, got {len(photo_paths)}")
+
+    collage = IncrementalCollage(TEMPLATE_PATH)
+    for p in photo_paths:
+        collage.add_shot(p)
+    return collage.finish(output_path, config)
 
     # Deprecate this... calls up the old way to composite. use 'if tpl'
     # No template.toml next to the style then use legacy layout
@@ -0,0 +1,261 @@
+# app/collage_filters.py
+# Per-slot photo filters for the collage renderer.
+#
+# The old apply_filters chained one Pillow call per filter, each making a
+# new full size copy of the slot. Here the per-pixel filters are folded
+# together: anything that works channel by channel becomes one 256-entry
+# table per band, and the colour mixing filters (bw, sepia, saturation)
+# become a colour matrix. A typical filter list ends up as a single
+# Image.point() pass. Sharpen/blur look at neighbouring pixels so they stay
+# separate steps, in the order the template lists them. Their radius is in
+# pixels of the full capture: on a shot decoded smaller (see open_shot) it's
+# scaled down to match, so the slot looks the same either way.
+from __future__ import annotations
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+# ITU-R 601 luma, same weights Pillow uses for convert("L")
+_LUMA = np.array([0.299, 0.587, 0.114])
+_IDENTITY = np.tile(np.arange(256, dtype=np.uint8), (3, 1))
+
+# ImageOps.colorize(g, "#704214", "#F5DEB3")
+_SEPIA_BLACK = (0x70, 0x42, 0x14)
+_SEPIA_WHITE = (0xF5, 0xDE, 0xB3)
+
+# img.info key: how many times smaller than the capture a shot was decoded
+REDUCED_INFO = "reduced"
+
+_SPATIAL = {
+    "sharpen": lambda s: ImageFilter.UnsharpMask(radius=2 * s, percent=150, threshold=3),
+    "blur": lambda s: ImageFilter.GaussianBlur(2 * s),
+}
+
+
+def parse_filters(specs: list[str] | None) -> list[tuple[str, float | None]]:
+    """["contrast:1.2", "sharpen"] -> [("contrast", 1.2), ("sharpen", None)]"""
+    out = []
+    for spec in specs or []:
+        if ":" in spec:
+            name, arg = spec.split(":", 1)
+            out.append((name, float(arg)))
+        else:
+            out.append((spec, None))
+    return out
+
+
+# ---- lookup tables ----------------------------------------------------------
+# Every table is a (3, 256) uint8 array, one row per band.
+
+
+def _blend_lut(base: float, factor: float) -> np.ndarray:
+    # Image.blend(degenerate, image, factor) truncates toward zero
+    i = np.arange(256, dtype=np.float64)
+    v = np.clip(base + factor * (i - base), 0, 255).astype(np.uint8)
+    return np.tile(v, (3, 1))
+
+
+def _gamma_lut(val: float | None) -> np.ndarray:
+    gamma = 1.0 / (1.0 + (val if val is not None else 0.0))
+    v = np.round(255.0 * (np.arange(256) / 255.0) ** gamma)
+    return np.tile(np.clip(v, 0, 255).astype(np.uint8), (3, 1))
+
+
+def _sepia_lut() -> np.ndarray:
+    rows = []
+    for lo, hi in zip(_SEPIA_BLACK, _SEPIA_WHITE):
+        rows.append([lo + i * (hi - lo) // 255 for i in range(255)] + [hi])
+    return np.array(rows, dtype=np.uint8)
+
+
+def _autocontrast_lut(hist: np.ndarray) -> np.ndarray:
+    # mirrors ImageOps.autocontrast(cutoff=0)
+    lut = _IDENTITY.copy()
+    ix = np.arange(256, dtype=np.float64)
+    for b in range(3):
+        nz = np.flatnonzero(hist[b])
+        if len(nz) == 0 or nz[-1] <= nz[0]:
+            continue
+        lo, hi = nz[0], nz[-1]
+        scale = 255.0 / (hi - lo)
+        lut[b] = np.clip((ix * scale - lo * scale).astype(np.int64), 0, 255)
+    return lut
+
+
+def _equalize_lut(hist: np.ndarray) -> np.ndarray:
+    # mirrors ImageOps.equalize
+    lut = _IDENTITY.copy()
+    for b in range(3):
+        h = hist[b].astype(np.int64)
+        nz = h[h > 0]
+        if len(nz) <= 1:
+            continue
+        step = (int(nz.sum()) - int(nz[-1])) // 255
+        if not step:
+            continue
+        n = step // 2 + np.concatenate(([0], np.cumsum(h)[:-1]))
+        lut[b] = np.clip(n // step, 0, 255)
+    return lut
+
+
+def _contrast_lut(hist: np.ndarray, val: float | None) -> np.ndarray:
+    # ImageEnhance.Contrast blends toward the mean grey level
+    counts = hist.sum(axis=1)
+    means = (hist * np.arange(256)).sum(axis=1) / np.maximum(counts, 1)
+    mean = int(float(_LUMA @ means) + 0.5)
+    return _blend_lut(float(mean), val if val is not None else 1.0)
+
+
+# filters that need the histogram of the image as it is at that point
+_STAT_LUTS = {
+    "auto_contrast": lambda hist, val: _autocontrast_lut(hist),
+    "equalize": lambda hist, val: _equalize_lut(hist),
+    "contrast": _contrast_lut,
+}
+
+
+# ---- colour matrices --------------------------------------------------------
+
+
+# 3x4 matrices in Image.convert("RGB", matrix) layout: three weights and an
+# offset per output band. convert() rounds, so the -0.5 offset on saturation
+# gives the truncation Image.blend would have done.
+
+
+def _grey_matrix() -> np.ndarray:
+    return np.column_stack([np.tile(_LUMA, (3, 1)), np.zeros(3)])
+
+
+def _saturation_matrix(val: float | None) -> np.ndarray:
+    f = val if val is not None else 1.0
+    m = f * np.eye(3) + (1.0 - f) * np.tile(_LUMA, (3, 1))
+    return np.column_stack([m, np.full(3, -0.5)])
+
+
+class FilterChain:
+    """A template's filter list, pre-fused into as few image passes as possible.
+
+    Steps are ("lut", table), ("matrix", 3x4), ("stat", name, val) for the
+    histogram driven filters, and ("spatial", factory). Neighbouring tables
+    are merged when the chain is built; stat tables are worked out from the
+    histogram at apply time and merged into whatever is pending.
+    """
+
+    def __init__(self, specs: list[str] | None):
+        self.steps: list[tuple] = []
+        for name, val in parse_filters(specs):
+            if name in _STAT_LUTS:
+                self.steps.append(("stat", name, val))
+            elif name in _SPATIAL:
+                self.steps.append(("spatial", _SPATIAL[name]))
+            elif name == "bw":
+                self.steps.append(("matrix", _grey_matrix()))
+            elif name == "sepia":
+                self.steps.append(("matrix", _grey_matrix()))
+                self._push_lut(_sepia_lut())
+            elif name == "exposure":  # simple gamma
+                self._push_lut(_gamma_lut(val))
+            elif name == "saturation":
+                self.steps.append(("matrix", _saturation_matrix(val)))
+            elif name == "brightness":
+                self._push_lut(_blend_lut(0.0, val if val is not None else 1.0))
+
+    def __bool__(self) -> bool:
+        return bool(self.steps)
+
+    def _push_lut(self, lut: np.ndarray) -> None:
+        if self.steps and self.steps[-1][0] == "lut":
+            self.steps[-1] = ("lut", _compose(self.steps[-1][1], lut))
+        else:
+            self.steps.append(("lut", lut))
+
+    def apply(self, img: Image.Image) -> Image.Image:
+        if not self.steps:
+            return img
+        # spatial radii are for the full capture
+        scale = 1.0 / float(img.info.get(REDUCED_INFO, 1))
+
+        alpha = None
+        if img.mode != "RGB":
+            if "A" in img.getbands():
+                alpha = img.getchannel("A")
+            img = img.convert("RGB")
+
+        run = _Run(img)
+        for step in self.steps:
+            kind = step[0]
+            if kind == "lut":
+                run.lut(step[1])
+            elif kind == "matrix":
+                run.matrix(step[1])
+            elif kind == "stat":
+                run.lut(_STAT_LUTS[step[1]](run.histogram(), step[2]))
+            elif kind == "spatial":
+                run.flush()
+                run.img = run.img.filter(step[1](scale))
+        out = run.flush()
+
+        if alpha is not None:
+            out = out.convert("RGBA")
+            out.putalpha(alpha)
+        return out
+
+
+def _compose(first: np.ndarray, then: np.ndarray) -> np.ndarray:
+    """Table equivalent to applying `first` and then `then`."""
+    return np.stack([then[b][first[b]] for b in range(3)])
+
+
+class _Run:
+    """Pending table/matrix work against one image, applied lazily."""
+
+    def __init__(self, img: Image.Image):
+        self.img = img
+        self.pending: list[tuple[str, np.ndarray]] = []
+        self._hist: np.ndarray | None = None  # histogram of self.img
+
+    def lut(self, lut: np.ndarray) -> None:
+        if self.pending and self.pending[-1][0] == "lut":
+            self.pending[-1] = ("lut", _compose(self.pending[-1][1], lut))
+        else:
+            self.pending.append(("lut", lut))
+
+    def matrix(self, m: np.ndarray) -> None:
+        self.pending.append(("matrix", m))
+
+    def histogram(self) -> np.ndarray:
+        """Histogram of the image as it would be after the pending work.
+
+        Tables only move whole histogram bins around, so a pending table is
+        applied to the counts rather than the pixels. A pending matrix mixes
+        channels and has to be run for real first.
+        """
+        if any(kind == "matrix" for kind, _ in self.pending):
+            self.flush()
+        if self._hist is None:
+            self._hist = np.array(self.img.histogram(), dtype=np.int64).reshape(3, 256)
+        if not self.pending:
+            return self._hist
+        lut = self.pending[0][1]
+        return np.stack(
+            [
+                np.bincount(lut[b], weights=self._hist[b], minlength=256).astype(np.int64)
+                for b in range(3)
+            ]
+        )
+
+    def flush(self) -> Image.Image:
+        for kind, data in self.pending:
+            if kind == "lut":
+                self.img = self.img.point(data.reshape(-1).tolist())
+            else:
+                self.img = self.img.convert("RGB", tuple(data.reshape(-1).tolist()))
+            self._hist = None
+        self.pending = []
+        return self.img
+
+
+def apply_filters(img: Image.Image, specs: list[str] | None) -> Image.Image:
+    if not specs:
+        return img
+    return FilterChain(specs).apply(img)
@@ -1,13 +1,21 @@
 # app/collage_renderer.py
 from __future__ import annotations
 
+import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Mapping
 
 import tomllib
-from PIL import Image, ImageDraw, ImageEnhance, ImageFilter, ImageFont, ImageOps
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+from app import fonts
+from app.artifacts import save_composite
+from app.collage_filters import FilterChain
+from app.timing import Timeline, span
 
 PCT = re.compile(r"^(\d+(?:\.\d+)?)%$")
 
@@ -38,43 +46,6 @@ def rounded_mask(w: int, h: int, r: int) -> Image.Image:
     return mask
 
 
-def apply_filters(img: Image.Image, specs: list[str] | None) -> Image.Image:
-    if not specs:
-        return img
-    out = img
-    for spec in specs:
-        if ":" in spec:
-            name, arg = spec.split(":", 1)
-            val = float(arg)
-        else:
-            name, val = spec, None
-        if name == "auto_contrast":
-            out = ImageOps.autocontrast(out)
-        elif name == "equalize":
-            out = ImageOps.equalize(out)
-        elif name == "sharpen":
-            out = out.filter(
-                ImageFilter.UnsharpMask(radius=2, percent=150, threshold=3)
-            )
-        elif name == "blur":
-            out = out.filter(ImageFilter.GaussianBlur(2))
-        elif name == "bw":
-            out = ImageOps.grayscale(out).convert("RGB")
-        elif name == "sepia":
-            g = ImageOps.grayscale(out)
-            out = ImageOps.colorize(g, "#704214", "#F5DEB3")
-        elif name == "exposure":  # simple gamma
-            gamma = 1.0 / (1.0 + (val if val is not None else 0.0))
-            out = ImageOps.gamma(out, gamma)
-        elif name == "saturation":
-            out = ImageEnhance.Color(out).enhance(val if val is not None else 1.0)
-        elif name == "brightness":
-            out = ImageEnhance.Brightness(out).enhance(val if val is not None else 1.0)
-        elif name == "contrast":
-            out = ImageEnhance.Contrast(out).enhance(val if val is not None else 1.0)
-    return out
-
-
 def _load_font(font_spec: dict, template_dir: Path):
     """Return a PIL ImageFont from either a file path or a system family lookup."""
     size = int(font_spec.get("size", 24))
@@ -86,53 +57,21 @@ def _load_font(font_spec: dict, template_dir: Path):
         if not fp.is_absolute():
             fp = (template_dir / fp).resolve()
         try:
-            return ImageFont.truetype(str(fp), size)
+            return fonts.truetype(str(fp), size)
         except Exception as e:
             print(f"⚠️ Could not load font at {fp}: {e}")
 
-    # 2) System font by family/weight/style (best on Linux via fontconfig)
+    # 2) System font by family/weight/style (fc-match, then the font index)
     family = font_spec.get("family")
     if family:
-        style_bits = []
-        if font_spec.get("weight"):  # e.g., "Bold", "Medium"
-            style_bits.append(str(font_spec["weight"]))
-        if font_spec.get("style"):  # e.g., "Italic"
-            style_bits.append(str(font_spec["style"]))
-        style_str = " ".join(style_bits) if style_bits else None
-
-        # Try fc-match (Linux/RPi typically has it)
-        try:
-            query = family + (f":style={style_str}" if style_str else "")
-            path = subprocess.check_output(
-                ["fc-match", "-f", "%{file}\n", query], text=True
-            ).strip()
-            if path and Path(path).exists():
-                return ImageFont.truetype(path, size)
-        except Exception:
-            pass
-
-        # Fallback: search common font dirs (macOS/Windows/Linux)
-        candidates = [
-            Path("/usr/share/fonts"),
-            Path("/usr/local/share/fonts"),
-            Path.home() / ".local/share/fonts",
-            Path("/System/Library/Fonts"),
-            Path("/Library/Fonts"),
-            Path("C:/Windows/Fonts"),
-        ]
-        stem = family.replace(" ", "").lower()
-        for base in candidates:
-            if not base.exists():
-                continue
+        path = fonts.FONT_INDEX.lookup(
+            family, font_spec.get("weight"), font_spec.get("style")
+        )
+        if path:
             try:
-                for fp in base.rglob("*.ttf"):
-                    if stem in fp.stem.replace(" ", "").lower():
-                        try:
-                            return ImageFont.truetype(str(fp), size)
-                        except Exception:
-                            continue
-            except Exception:
-                continue
+                return fonts.truetype(path, size)
+            except Exception as e:
+                print(f"⚠️ Could not load font at {path}: {e}")
 
     # 3) Final fallbacks
     for fp in [
@@ -142,7 +81,7 @@ def _load_font(font_spec: dict, template_dir: Path):
     ]:
         if fp.exists():
             try:
-                return ImageFont.truetype(str(fp), size)
+                return fonts.truetype(str(fp), size)
             except Exception:
                 pass
 
@@ -185,177 +124,503 @@ def draw_text(
     )
 
 
+class CompiledTemplate:
+    """A parsed template.toml with every layer resolved against its canvas.
+
+    Percentages, anchors and rounded masks are worked out once here so a
+    render only has to do the pixel work for the shots.
+    """
+
+    def __init__(self, path: Path, mtime_ns: int, tpl: dict):
+        self.path = path
+        self.dir = path.parent
+        self.mtime_ns = mtime_ns
+
+        self.width = int(tpl["canvas"]["width"])
+        self.height = int(tpl["canvas"]["height"])
+        self.color = tpl["canvas"].get("color", "#ffffff")
+
+        self.background = None
+        if "background" in tpl and "image" in tpl["background"]:
+            self.background = {
+                "image": self.dir / tpl["background"]["image"],
+                "fit": tpl["background"].get("fit", "cover"),
+            }
+
+        self.layers = []
+        for layer in tpl.get("layers", []):
+            compiled = _compile_layer(layer, self.width, self.height)
+            if compiled is not None:
+                self.layers.append(compiled)
+
+        # Layers up to the first one that needs the shots (or today's date)
+        # look the same every session; they're rasterized once onto the
+        # background as the "base plate". Overlays further up the stack
+        # can't be baked in, but their loaded/resized/faded image is cached.
+        self.static_prefix = len(self.layers)
+        for i, layer in enumerate(self.layers):
+            if not _is_static(layer):
+                self.static_prefix = i
+                break
+        self._plate: Image.Image | None = None
+        self._plate_sig: tuple | None = None
+        self._overlays: dict[int, Image.Image | None] = {}
+        self._plate_lock = threading.Lock()
+
+    def _asset_files(self) -> list[Path]:
+        files = []
+        if self.background is not None:
+            files.append(self.background["image"])
+        for layer in self.layers:
+            if layer["type"] == "image_overlay":
+                files.append(self.dir / layer["image"])
+            elif layer["type"] == "text" and layer["font"].get("path"):
+                # same resolution draw_text uses
+                files.append((Path(".") / layer["font"]["path"]).resolve())
+        return files
+
+    def _asset_signature(self) -> tuple:
+        sig = []
+        for fp in self._asset_files():
+            try:
+                sig.append(fp.stat().st_mtime_ns)
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    def _check_assets(self) -> None:
+        # caller holds _plate_lock
+        sig = self._asset_signature()
+        if sig != self._plate_sig:
+            self._plate = None
+            self._overlays = {}
+            self._plate_sig = sig
+
+    def base_plate(self, timeline: Timeline | None = None) -> Image.Image:
+        """Canvas colour, background and leading static layers, rendered once.
+
+        Shared between renders: copy it before drawing on it. The background
+        and static layer spans only show up on the render that builds it.
+        """
+        with self._plate_lock:
+            self._check_assets()
+            if self._plate is None:
+                plate = Image.new("RGBA", (self.width, self.height), self.color)
+                if self.background is not None:
+                    with span(timeline, "background", fit=self.background["fit"]):
+                        _draw_background(plate, self.background)
+                for i in range(self.static_prefix):
+                    with span(timeline, "layer", index=i, type=self.layers[i]["type"]):
+                        self._draw_static(plate, i)
+                self._plate = plate
+            return self._plate
+
+    def overlay(self, index: int) -> Image.Image | None:
+        """The ready-to-composite image for an image_overlay layer (cached)."""
+        with self._plate_lock:
+            self._check_assets()
+            if index not in self._overlays:
+                self._overlays[index] = _load_overlay(self.dir, self.layers[index])
+            return self._overlays[index]
+
+    def _draw_static(self, canvas: Image.Image, index: int) -> None:
+        # caller holds _plate_lock
+        layer = self.layers[index]
+        if layer["type"] == "image_overlay":
+            if index not in self._overlays:
+                self._overlays[index] = _load_overlay(self.dir, layer)
+            _place_overlay(canvas, layer, self._overlays[index])
+        elif layer["type"] == "text":
+            _draw_text_layer(canvas, layer)
+
+    def slot_size(self, name: str) -> tuple[int, int] | None:
+        """Largest (w, h) any image_slot asks of the named shot, or None if unused."""
+        sizes = [
+            (layer["w"], layer["h"])
+            for layer in self.layers
+            if layer["type"] == "image_slot" and layer["name"] == name
+        ]
+        if not sizes:
+            return None
+        return max(w for w, _ in sizes), max(h for _, h in sizes)
+
+
+def _compile_layer(layer: dict, W: int, H: int) -> dict | None:
+    t = layer["type"]
+    if t == "image_slot":
+        w = to_px(layer["w"], W)
+        h = to_px(layer["h"], H)
+        r = int(layer.get("radius", 0))
+        shadow = None
+        if "shadow" in layer:
+            sh = layer["shadow"]
+            shadow = {
+                "dx": int(sh.get("dx", 0)),
+                "dy": int(sh.get("dy", 0)),
+                "blur": int(sh.get("blur", 12)),
+                "color": sh.get("color", "#00000040"),
+            }
+        border = None
+        if "border" in layer and int(layer["border"].get("width", 0)) > 0:
+            border = {
+                "width": int(layer["border"]["width"]),
+                "color": layer["border"]["color"],
+            }
+        rotate = None
+        if "transform" in layer and "rotate" in layer["transform"]:
+            rotate = layer["transform"]["rotate"]
+        return {
+            "type": t,
+            "name": layer["name"],  # 'shot1' / 'shot2' / 'shot3'
+            "filters": FilterChain(layer.get("filters")),
+            "x": to_px(layer["x"], W),
+            "y": to_px(layer["y"], H),
+            "w": w,
+            "h": h,
+            "radius": r,
+            "mask": rounded_mask(w, h, r) if r > 0 else None,
+            "rotate": rotate,
+            "shadow": shadow,
+            "border": border,
+            "anchor": layer.get("anchor", "top_left"),
+            # shadow/border rasters, see _slot_decor()
+            "decor": {},
+        }
+
+    if t == "image_overlay":
+        size = None
+        if "w" in layer and "h" in layer:
+            size = (to_px(layer["w"], W), to_px(layer["h"], H))
+        return {
+            "type": t,
+            "image": layer["image"],
+            "size": size,
+            "opacity": float(layer["opacity"]) if "opacity" in layer else None,
+            "x": to_px(layer["x"], W),
+            "y": to_px(layer["y"], H),
+            "anchor": layer.get("anchor", "top_left"),
+        }
+
+    if t == "text":
+        return {
+            "type": t,
+            "text": layer["text"],
+            "x": to_px(layer["x"], W),
+            "y": to_px(layer["y"], H),
+            "font": layer["font"],
+            "fill": layer.get("fill", "#000000"),
+            "align": layer.get("align", "center"),
+            "stroke": layer.get("stroke"),
+            "tracking": layer.get("tracking", 0),
+            "anchor": layer.get("anchor", "top_left"),
+        }
+
+    return None
+
+
+def _is_static(layer: dict) -> bool:
+    """True if the layer renders the same regardless of shots or date."""
+    if layer["type"] == "image_overlay":
+        return True
+    if layer["type"] == "text":
+        # any {PLACEHOLDER} may change per session
+        return "{" not in layer["text"]
+    return False
+
+
+def _draw_background(canvas: Image.Image, background: dict) -> None:
+    W, H = canvas.size
+    try:
+        bg = Image.open(background["image"]).convert("RGBA")
+    except OSError as e:
+        print(f"⚠️ Could not load background {background['image']}: {e}")
+        return
+    fit = background["fit"]
+    if fit in ("cover", "contain", "stretch", "center", "tile"):
+        if fit == "stretch":
+            bg = bg.resize((W, H), Image.LANCZOS)
+            canvas.alpha_composite(bg, (0, 0))
+        elif fit == "center":
+            x = (W - bg.width) // 2
+            y = (H - bg.height) // 2
+            canvas.alpha_composite(bg, (x, y))
+        elif fit == "tile":
+            for yy in range(0, H, bg.height):
+                for xx in range(0, W, bg.width):
+                    canvas.alpha_composite(bg, (xx, yy))
+        else:
+            # cover / contain
+            ratio = (
+                min(W / bg.width, H / bg.height)
+                if fit == "contain"
+                else max(W / bg.width, H / bg.height)
+            )
+            rb = bg.resize(
+                (int(bg.width * ratio), int(bg.height * ratio)), Image.LANCZOS
+            )
+            x = (W - rb.width) // 2
+            y = (H - rb.height) // 2
+            canvas.alpha_composite(rb, (x, y))
+
+
+def _load_overlay(template_dir: Path, layer: dict) -> Image.Image | None:
+    p = template_dir / layer["image"]
+    try:
+        ov = Image.open(p).convert("RGBA")
+    except OSError as e:
+        print(f"⚠️ Could not load overlay {p}: {e}")
+        return None
+    if layer["size"] is not None:
+        ov = ov.resize(layer["size"], Image.LANCZOS)
+    if layer["opacity"] is not None:
+        opacity = layer["opacity"]
+        a = ov.split()[-1].point(lambda i: int(i * opacity))
+        ov.putalpha(a)
+    return ov
+
+
+def _place_overlay(canvas: Image.Image, layer: dict, ov: Image.Image | None) -> None:
+    if ov is None:
+        return
+    dx, dy = anchor_offset(ov.width, ov.height, layer["anchor"])
+    canvas.alpha_composite(ov, (layer["x"] + dx, layer["y"] + dy))
+
+
+def _draw_text_layer(canvas: Image.Image, layer: dict) -> None:
+    raw = layer["text"]
+
+    # simple variables, plus strftime support
+    # may modify to use settings.py to manage...
+    def subst(s: str) -> str:
+        # s = s.replace("{EVENT_NAME}", variables.get("EVENT_NAME", "Event"))
+        # s = s.replace("{SESSION_ID}", variables.get("SESSION_ID", "0000"))
+        # s = s.replace("{APP_VERSION}", variables.get("APP_VERSION", "0.0.0"))
+        # {DATE:%b %d, %Y}
+        if "{DATE:" in s:
+            fmt = s.split("{DATE:", 1)[1].split("}", 1)[0]
+            s = s.replace("{DATE:" + fmt + "}", datetime.now().strftime(fmt))
+        return s
+
+    txt = subst(raw)
+    # call draw text function
+    draw_text(
+        canvas,
+        txt,
+        layer["x"],
+        layer["y"],
+        layer["font"],
+        layer["fill"],
+        align=layer["align"],
+        stroke=layer["stroke"],
+        tracking=layer["tracking"],
+        anchor=layer["anchor"],
+    )
+
+
+_TEMPLATE_CACHE: dict[Path, CompiledTemplate] = {}
+_TEMPLATE_LOCK = threading.Lock()
+
+
+def load_template(template_path: str | Path) -> CompiledTemplate:
+    """Return the compiled template, re-parsing only when the file's mtime changes."""
+    path = Path(template_path).resolve()
+    mtime_ns = path.stat().st_mtime_ns
+    with _TEMPLATE_LOCK:
+        ct = _TEMPLATE_CACHE.get(path)
+        if ct is None or ct.mtime_ns != mtime_ns:
+            with path.open("rb") as f:
+                tpl = tomllib.load(f)
+            ct = CompiledTemplate(path, mtime_ns, tpl)
+            _TEMPLATE_CACHE[path] = ct
+    return ct
+
+
+def _slot_decor(layer: dict, cover_box: tuple[int, int, int, int]) -> dict:
+    """Shadow and border rasters for an image_slot, built once and reused.
+
+    Both only depend on the frame's alpha: the rounded mask if there is one,
+    otherwise the area the cover-fit photo fills. That alpha is rotated
+    exactly as the frame is, so the blur runs once per template instead of
+    once per shot.
+    """
+    key = None if layer["mask"] is not None else cover_box
+    decor = layer["decor"].get(key)
+    if decor is not None:
+        return decor
+
+    if layer["mask"] is not None:
+        alpha = layer["mask"]
+    else:
+        alpha = Image.new("L", (layer["w"], layer["h"]), 0)
+        alpha.paste(255, cover_box)
+    if layer["rotate"] is not None:
+        alpha = alpha.rotate(layer["rotate"], expand=True, resample=Image.BICUBIC)
+
+    shadow = None
+    if layer["shadow"] is not None:
+        sh = layer["shadow"]
+        sfill = Image.new("RGBA", alpha.size, sh["color"])
+        shadow = Image.composite(
+            sfill, Image.new("RGBA", alpha.size, (0, 0, 0, 0)), alpha
+        ).filter(ImageFilter.GaussianBlur(sh["blur"]))
+
+    border = None
+    if layer["border"] is not None:
+        b = layer["border"]
+        border = Image.new("RGBA", alpha.size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(border)
+        draw.rounded_rectangle(
+            [0, 0, alpha.width - 1, alpha.height - 1],
+            radius=layer["radius"],
+            outline=b["color"],
+            width=b["width"],
+        )
+
+    decor = {"size": alpha.size, "shadow": shadow, "border": border}
+    layer["decor"][key] = decor
+    return decor
+
+
+def prepare_slot(
+    layer: dict, src_img: Image.Image, timeline: Timeline | None = None
+) -> dict:
+    """Filter, fit, mask, rotate, shadow and border one image_slot.
+
+    Touches nothing but its own images, so slots can be prepared on worker
+    threads and composited in layer order afterwards.
+    """
+    with span(timeline, "slot_prepare", name=layer["name"]):
+        return _prepare_slot(layer, src_img, timeline)
+
+
+def _prepare_slot(
+    layer: dict, src_img: Image.Image, timeline: Timeline | None = None
+) -> dict:
+    def stage(name: str):
+        return span(timeline, "slot", stage=name, name=layer["name"])
+
+    # filters (on the RGB shot, before it picks up an alpha band)
+    with stage("filters"):
+        img = layer["filters"].apply(src_img).convert("RGBA")
+
+    # fit image into box (cover)
+    with stage("resize"):
+        w, h = layer["w"], layer["h"]
+        ir = max(w / img.width, h / img.height)
+        ri = img.resize((int(img.width * ir), int(img.height * ir)), Image.LANCZOS)
+        ix = (w - ri.width) // 2
+        iy = (h - ri.height) // 2
+        frame = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+        frame.alpha_composite(ri, (ix, iy))
+
+    # rounded mask
+    if layer["mask"] is not None:
+        with stage("mask"):
+            frame.putalpha(layer["mask"])
+
+    # rotate (about center)
+    if layer["rotate"] is not None:
+        with stage("rotate"):
+            frame = frame.rotate(layer["rotate"], expand=True, resample=Image.BICUBIC)
+
+    # shadow (simple drop shadow) and border come pre-rendered; the first
+    # shot through a slot pays for building them
+    with stage("shadow"):
+        decor = _slot_decor(layer, (ix, iy, ix + ri.width, iy + ri.height))
+    shadow_pos = None
+    if decor["shadow"] is not None:
+        sh = layer["shadow"]
+        shadow_pos = (layer["x"] + sh["dx"], layer["y"] + sh["dy"])
+
+    # border
+    if decor["border"] is not None:
+        with stage("border"):
+            frame = Image.alpha_composite(frame, decor["border"])
+
+    dx, dy = anchor_offset(frame.width, frame.height, layer["anchor"])
+    return {
+        "frame": frame,
+        "pos": (layer["x"] + dx, layer["y"] + dy),
+        "shadow": decor["shadow"],
+        "shadow_pos": shadow_pos,
+    }
+
+
+# Pillow drops the GIL for resize/filter/rotate, so threads are enough to
+# spread the slots over the Pi's cores.
+SLOT_WORKERS = min(4, os.cpu_count() or 1)
+_slot_pool: ThreadPoolExecutor | None = None
+
+
+def slot_pool() -> ThreadPoolExecutor:
+    global _slot_pool
+    if _slot_pool is None:
+        _slot_pool = ThreadPoolExecutor(
+            max_workers=SLOT_WORKERS, thread_name_prefix="collage-slot"
+        )
+    return _slot_pool
+
+
 def render_collage(
     template_path: str | Path,
     shots: dict[str, Image.Image],
     variables: Mapping[str, str],
     out_path: str | Path,
+    prepared: Mapping[int, dict] | None = None,
+    timeline: Timeline | None = None,
 ) -> Path:
-    template_path = Path(template_path)
+    """Render the template to out_path.
+
+    `prepared` holds prepare_slot() results already made for this compiled
+    template, keyed by layer index; those slots skip straight to compositing.
+    Pass a Timeline to get per-phase/per-layer wall times.
+    """
     out_path = Path(out_path)
-    template_dir = template_path.parent
-
-    with template_path.open("rb") as f:
-        tpl = tomllib.load(f)
-
-    W, H = int(tpl["canvas"]["width"]), int(tpl["canvas"]["height"])
-    bg_color = tpl["canvas"].get("color", "#ffffff")
-    canvas = Image.new("RGBA", (W, H), bg_color)
-
-    # background image
-    if "background" in tpl and "image" in tpl["background"]:
-        bg_file = template_dir / tpl["background"]["image"]
-        bg = Image.open(bg_file).convert("RGBA")
-        fit = tpl["background"].get("fit", "cover")
-        if fit in ("cover", "contain", "stretch", "center", "tile"):
-            if fit == "stretch":
-                bg = bg.resize((W, H), Image.LANCZOS)
-                canvas.alpha_composite(bg, (0, 0))
-            elif fit == "center":
-                x = (W - bg.width) // 2
-                y = (H - bg.height) // 2
-                canvas.alpha_composite(bg, (x, y))
-            elif fit == "tile":
-                for yy in range(0, H, bg.height):
-                    for xx in range(0, W, bg.width):
-                        canvas.alpha_composite(bg, (xx, yy))
-            else:
-                # cover / contain
-                ratio = (
-                    min(W / bg.width, H / bg.height)
-                    if fit == "contain"
-                    else max(W / bg.width, H / bg.height)
-                )
-                rb = bg.resize(
-                    (int(bg.width * ratio), int(bg.height * ratio)), Image.LANCZOS
-                )
-                x = (W - rb.width) // 2
-                y = (H - rb.height) // 2
-                canvas.alpha_composite(rb, (x, y))
-
-    for layer in tpl.get("layers", []):
-        t = layer["type"]
-        if t == "image_slot":
-            src_name = layer["name"]  # 'shot1' / 'shot2' / 'shot3'
-            src_img = shots.get(src_name)
-            if src_img is None:
-                continue
-            img = src_img.convert("RGBA")
-
-            # filters
-            img = apply_filters(img, layer.get("filters"))
-
-            # fit image into box (cover)
-            w = to_px(layer["w"], W)
-            h = to_px(layer["h"], H)
-            ir = max(w / img.width, h / img.height)
-            ri = img.resize((int(img.width * ir), int(img.height * ir)), Image.LANCZOS)
-            ix = (w - ri.width) // 2
-            iy = (h - ri.height) // 2
-            frame = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-            frame.alpha_composite(ri, (ix, iy))
-
-            # rounded mask
-            r = int(layer.get("radius", 0))
-            if r > 0:
-                mask = rounded_mask(w, h, r)
-                frame.putalpha(mask)
-
-            # rotate (about center)
-            if "transform" in layer and "rotate" in layer["transform"]:
-                frame = frame.rotate(
-                    layer["transform"]["rotate"], expand=True, resample=Image.BICUBIC
-                )
-
-            # shadow (simple drop shadow)
-            if "shadow" in layer:
-                sh = layer["shadow"]
-                sx, sy = int(sh.get("dx", 0)), int(sh.get("dy", 0))
-                blur = int(sh.get("blur", 12))
-                scol = sh.get("color", "#00000040")
-                alpha = frame.split()[-1]
-                sfill = Image.new("RGBA", frame.size, scol)
-                shadow = Image.composite(
-                    sfill, Image.new("RGBA", frame.size, (0, 0, 0, 0)), alpha
-                ).filter(ImageFilter.GaussianBlur(blur))
-                canvas.alpha_composite(
-                    shadow, (to_px(layer["x"], W) + sx, to_px(layer["y"], H) + sy)
-                )
-
-            # border
-            if "border" in layer:
-                b = layer["border"]
-                bw = int(b.get("width", 0))
-                if bw > 0:
-                    border = Image.new(
-                        "RGBA", (frame.width, frame.height), (0, 0, 0, 0)
-                    )
-                    draw = ImageDraw.Draw(border)
-                    draw.rounded_rectangle(
-                        [0, 0, frame.width - 1, frame.height - 1],
-                        radius=r,
-                        outline=b["color"],
-                        width=bw,
-                    )
-                    frame = Image.alpha_composite(frame, border)
-
-            # place
-            x = to_px(layer["x"], W)
-            y = to_px(layer["y"], H)
-            dx, dy = anchor_offset(
-                frame.width, frame.height, layer.get("anchor", "top_left")
-            )
-            canvas.alpha_composite(frame, (x + dx, y + dy))
-
-        elif t == "image_overlay":
-            p = template_dir / layer["image"]
-            ov = Image.open(p).convert("RGBA")
-            if "w" in layer and "h" in layer:
-                ov = ov.resize(
-                    (to_px(layer["w"], W), to_px(layer["h"], H)), Image.LANCZOS
-                )
-            if "opacity" in layer:
-                a = ov.split()[-1].point(lambda i: int(i * float(layer["opacity"])))
-                ov.putalpha(a)
-            x = to_px(layer["x"], W)
-            y = to_px(layer["y"], H)
-            dx, dy = anchor_offset(ov.width, ov.height, layer.get("anchor", "top_left"))
-            canvas.alpha_composite(ov, (x + dx, y + dy))
-
-        elif t == "text":
-            raw = layer["text"]
-
-            # simple variables, plus strftime support
-            # may modify to use settings.py to manage...
-            def subst(s: str) -> str:
-                # s = s.replace("{EVENT_NAME}", variables.get("EVENT_NAME", "Event"))
-                # s = s.replace("{SESSION_ID}", variables.get("SESSION_ID", "0000"))
-                # s = s.replace("{APP_VERSION}", variables.get("APP_VERSION", "0.0.0"))
-                # {DATE:%b %d, %Y}
-                if "{DATE:" in s:
-                    fmt = s.split("{DATE:", 1)[1].split("}", 1)[0]
-                    s = s.replace("{DATE:" + fmt + "}", datetime.now().strftime(fmt))
-                return s
-
-            txt = subst(raw)
-            x = to_px(layer["x"], W)
-            y = to_px(layer["y"], H)
-            # call draw text function
-            draw_text(
-                canvas,
-                txt,
-                x,
-                y,
-                layer["font"],
-                layer.get("fill", "#000000"),
-                align=layer.get("align", "center"),
-                stroke=layer.get("stroke"),
-                tracking=layer.get("tracking", 0),
-                anchor=layer.get("anchor", "top_left"),
+    with span(timeline, "template"):
+        ct = load_template(template_path)
+    prepared = prepared or {}
+
+    # start every other slot now; they run while the canvas is laid down
+    pending = {}
+    for i, layer in enumerate(ct.layers):
+        if layer["type"] != "image_slot" or i in prepared:
+            continue
+        if shots.get(layer["name"]) is not None:
+            pending[i] = slot_pool().submit(
+                prepare_slot, layer, shots[layer["name"]], timeline
             )
 
-    # ensure parent exists, save, and return Path
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    canvas = canvas.convert("RGB")  # strip alpha for JPEG if needed
-    canvas.save(out_path)
+    # every session starts from the cached base plate
+    with span(timeline, "plate"):
+        canvas = ct.base_plate(timeline).copy()
+
+    for i, layer in enumerate(ct.layers):
+        if i < ct.static_prefix:
+            continue  # already on the plate
+        t = layer["type"]
+        with span(timeline, "layer", index=i, type=t, name=layer.get("name")):
+            if t == "image_slot":
+                if i in prepared:
+                    slot = prepared[i]
+                elif i in pending:
+                    slot = pending[i].result()
+                else:
+                    continue
+                with span(timeline, "slot", stage="place", name=layer["name"]):
+                    if slot["shadow"] is not None:
+                        canvas.alpha_composite(slot["shadow"], slot["shadow_pos"])
+                    canvas.alpha_composite(slot["frame"], slot["pos"])
+
+            elif t == "image_overlay":
+                _place_overlay(canvas, layer, ct.overlay(i))
+
+            elif t == "text":
+                _draw_text_layer(canvas, layer)
+
+    # save (parent dirs are created) and keep the result in memory for
+    # preview/print/email, then return Path
+    with span(timeline, "convert"):
+        canvas = canvas.convert("RGB")  # strip alpha for JPEG if needed
+    with span(timeline, "save"):
+        save_composite(canvas, out_path)
     return out_path
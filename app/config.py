@@ -30,6 +30,8 @@ CAMERA_CONFIG = CONFIG.get("camera", {})
 CAMERAS_CONFIG = CONFIG.get("cameras", {})
 CAMERA1_CONFIG = CONFIG.get("camera1", {})
 CAMERA2_CONFIG = CONFIG.get("camera2", {})
+# [cameras] roles plus the per-camera sections, the way create_camera() takes them
+CAMERAS_SETUP = {**CAMERAS_CONFIG, "camera1": CAMERA1_CONFIG, "camera2": CAMERA2_CONFIG}
 IDLE_CONFIG = CONFIG.get("idle_screen", {})
 PHOTO_CONFIG = CONFIG.get("photo", {})
 COLLAGE_CONFIG = CONFIG.get("collage", {})  # deprecate or repurpose...
@@ -50,6 +52,9 @@ STYLE_PATH = STYLE_ROOT / STYLE_CONFIG.get("style_dir", "default")
 STYLE_FILE = STYLE_PATH / "style.qss"
 TEMPLATE_PATH = STYLE_PATH / "template.toml"  # photo layout template
 
+# machine-local caches (font index etc.), safe to delete at any time
+CACHE_PATH = APP_ROOT / SETTINGS_CONFIG.get("cache_path", "app/cache")
+
 EVENT_RAW = EVENT_LOADED / PHOTO_CONFIG.get("raw_path", "raw")
 EVENT_COMPS = EVENT_LOADED / PHOTO_CONFIG.get("composite_path", "comps")
 
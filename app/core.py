@@ -2,6 +2,7 @@ from PySide6.QtWidgets import QMainWindow, QStackedWidget
 from app.config import (
     CONFIG,
     CAMERA_CONFIG,
+    CAMERAS_SETUP,
     STYLE_PATH,
     STYLE_FILE,
     EVENT_LOADED,
@@ -11,13 +12,33 @@ from app.screens.capture import CaptureScreen
 from app.screens.settings import SettingsScreen
 from app.screens.email import EmailScreen
 from app.screens.preview import PreviewScreen
-from app.camera import CameraManager
+from app.camera import create_camera
+from app.camera_service import CameraClient
+from app.capture_queue import CaptureService
+from app.event_index import event_index
+from app.postprocess import PostProcessQueue
 from app import lights
 
 class AppController:
     def __init__(self):
         self.config = CONFIG
-        self.camera = CameraManager(CAMERA_CONFIG)
+        if CAMERA_CONFIG.get("service", False):
+            # camera in its own process
+            self.camera = CameraClient(CAMERA_CONFIG, CAMERAS_SETUP)
+        else:
+            self.camera = create_camera(CAMERA_CONFIG, CAMERAS_SETUP)
+        # one capture thread for the app's lifetime (shots, bursts, camera calls)
+        self.capture_service = CaptureService(self.camera)
+
+        # composite render, print-ready and display copies, off the UI thread
+        self.postprocess = PostProcessQueue()
+
+        # open the event index now; a missing one is rebuilt before the UI is up.
+        # Display copies for older composites are made as the slideshow gets to them.
+        try:
+            event_index()
+        except Exception as e:
+            print(f"⚠️ Event index unavailable: {e}")
 
         # Initialize lights hardware (no-op if unavailable)
         try:
@@ -59,6 +80,21 @@ class AppController:
     def go_to(self, screen):
         self.stack.setCurrentWidget(screen)
 
+    def print_event_summary(self):
+        """Event totals from the index, printed on the way out."""
+        try:
+            s = event_index().stats()
+        except Exception as e:
+            print(f"⚠️ Event summary unavailable: {e}")
+            return
+        cap = f"{s['avg_capture_ms']:.0f} ms" if s["avg_capture_ms"] is not None else "n/a"
+        render = f"{s['avg_render_ms']:.0f} ms" if s["avg_render_ms"] is not None else "n/a"
+        print(
+            f"📊 {EVENT_LOADED.name}: {s['sessions']} sessions, {s['shots']} shots, "
+            f"{s['composites']} composites, {s['prints']} prints, {s['emails']} emails "
+            f"(avg capture {cap}, avg render {render})"
+        )
+
     # This confirms that the EVENT_LOADED dir exists, if not, build.
     def load_last_session(self):
         if not EVENT_LOADED.exists():
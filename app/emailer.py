@@ -11,7 +11,9 @@ from pathlib import Path
 from string import Template
 from app.account import PASSWORD, USER, FROM
 
+from app.artifacts import get_artifact
 from app.config import EMAIL_CONFIG, APP_ROOT
+from app.event_index import event_index
 
 # Paths
 QUEUE_PATH: Path = APP_ROOT / EMAIL_CONFIG.get(
@@ -44,7 +46,9 @@ def send_email(to_email: str, image_path: Path | str, retrying: bool = False) ->
     msg.add_alternative(body, subtype="html")
 
     try:
-        img_data = image_path.read_bytes()
+        # use the composite bytes still in memory, else read the file
+        art = get_artifact(image_path)
+        img_data = art.data if art is not None else image_path.read_bytes()
         # Inline image (CID)
         img_part = MIMEImage(img_data, _subtype="jpeg")
         img_part.add_header("Content-ID", "<photo1>")
@@ -113,6 +117,8 @@ def retry_queued_emails() -> None:
         success = send_email(item["to"], Path(item["image"]), retrying=True)
         if not success:
             remaining.append(item)
+        else:
+            event_index().add_delivery(item["image"], "email", "sent", item["to"])
 
     QUEUE_PATH.write_text(json.dumps(remaining, indent=2), encoding="utf-8")
     print(f"🔁 Retried emails. {len(remaining)} remaining.")
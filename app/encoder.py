@@ -0,0 +1,112 @@
+# app/encoder.py
+# Background encode + save for captured shots.
+#
+# The camera hands back the frame as an image in memory; writing it out as
+# a JPEG (or whatever [photo] format says) and waiting on the SD card
+# happens here, one shot at a time, so the next countdown doesn't wait for
+# it. The queue is bounded: with encode_queue shots already waiting,
+# submit() blocks the capture worker until one is written, which keeps a
+# slow card from piling full-size frames up in memory.
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+from app.config import PHOTO_CONFIG
+
+
+def save_options(fmt: str, quality: int | None = None) -> dict:
+    """Pillow save() arguments for a [photo] format / quality."""
+    quality = int(quality if quality is not None else PHOTO_CONFIG.get("quality", 90))
+    if fmt == "JPEG":
+        return {"format": "JPEG", "quality": quality}
+    if fmt == "WEBP":
+        return {"format": "WEBP", "quality": quality}
+    return {"format": fmt}
+
+
+def save_photo(image: Image.Image, path: Path | str, quality: int | None = None) -> Path:
+    """Encode and write one shot, format picked from the file extension."""
+    path = Path(path)
+    fmt = Image.registered_extensions().get(path.suffix.lower(), "JPEG")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # write under a temp name so a half-written shot is never picked up
+    tmp = path.with_name(path.name + ".part")
+    image.save(tmp, **save_options(fmt, quality))
+    tmp.replace(path)
+    return path
+
+
+class EncodeQueue:
+    """Saves shots on one background thread, at most `limit` waiting."""
+
+    def __init__(self, limit: int | None = None):
+        limit = int(limit if limit is not None else PHOTO_CONFIG.get("encode_queue", 3))
+        self._slots = threading.BoundedSemaphore(max(1, limit))
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="photo-encode")
+        self._pending: dict[Path, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, image: Image.Image, path: Path | str) -> Future:
+        """Queue `image` to be written to `path`; blocks while the queue is full."""
+        path = Path(path)
+        self._slots.acquire()
+        try:
+            # submit and register in one go: _done needs the lock, so the
+            # entry is always in _pending before it can be taken out
+            with self._lock:
+                fut = self._pool.submit(save_photo, image, path)
+                self._pending[path] = fut
+        except BaseException:
+            self._slots.release()
+            raise
+        # outside the lock: on an already finished save this runs _done right here
+        fut.add_done_callback(lambda f: self._done(path, f))
+        return fut
+
+    def _done(self, path: Path, fut: Future) -> None:
+        self._slots.release()
+        if fut.exception() is not None:
+            # stays in _pending so a wait() for it raises the real error
+            print(f"⚠️ Could not save {path}: {fut.exception()}")
+            return
+        with self._lock:
+            if self._pending.get(path) is fut:
+                del self._pending[path]
+
+    def wait(self, path: Path | str) -> None:
+        """Block until `path` is on disk if it's still queued (raises on failure)."""
+        path = Path(path)
+        with self._lock:
+            fut = self._pending.get(path)
+        if fut is None:
+            return
+        try:
+            fut.result()
+        finally:
+            with self._lock:
+                if self._pending.get(path) is fut:
+                    del self._pending[path]
+
+    def flush(self) -> None:
+        """Block until everything queued so far has been written."""
+        with self._lock:
+            futs = list(self._pending.values())
+        for fut in futs:
+            try:
+                fut.result()
+            except Exception:
+                pass  # already reported in _done
+
+
+_queue: EncodeQueue | None = None
+
+
+def encode_queue() -> EncodeQueue:
+    global _queue
+    if _queue is None:
+        _queue = EncodeQueue()
+    return _queue
@@ -0,0 +1,329 @@
+# app/event_index.py
+# SQLite index of what's in an event: sessions, their shots and composite
+# (paths, sizes, timings) and every print / email of a composite.
+#
+# Lives in <event>/event_index.db and is written as a session goes along,
+# so the slideshow, stats and session numbering are queries instead of
+# directory listings. The photos on disk stay the source of truth: if the
+# database is missing, from an older version or corrupt it's rebuilt from
+# raw/ and comps/. Deliveries only exist here, so a rebuild keeps them
+# when it can. Paths are stored relative to the event folder, so moving or
+# renaming the install or the event doesn't strand them.
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from PIL import Image
+
+from app.config import EVENT_LOADED, PHOTO_CONFIG
+
+INDEX_FILE = "event_index.db"
+SCHEMA_VERSION = 2  # 2: paths relative to the event folder
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id          TEXT PRIMARY KEY,   -- "0042"
+    started_at  TEXT,
+    finished_at TEXT,
+    template    TEXT
+);
+CREATE TABLE IF NOT EXISTS shots (
+    session_id  TEXT NOT NULL,
+    photo       INTEGER NOT NULL,   -- 1-based
+    path        TEXT NOT NULL UNIQUE,
+    width       INTEGER,
+    height      INTEGER,
+    taken_at    TEXT,
+    capture_ms  REAL,               -- trigger (countdown 0) to image in memory
+    PRIMARY KEY (session_id, photo)
+);
+CREATE TABLE IF NOT EXISTS composites (
+    session_id  TEXT PRIMARY KEY,
+    path        TEXT NOT NULL UNIQUE,
+    width       INTEGER,
+    height      INTEGER,
+    created_at  TEXT,
+    render_ms   REAL
+);
+CREATE TABLE IF NOT EXISTS deliveries (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id  TEXT,
+    path        TEXT NOT NULL,
+    kind        TEXT NOT NULL,      -- "print" | "email"
+    target      TEXT,               -- printer name / address
+    status      TEXT NOT NULL,      -- "sent" | "queued" | "failed"
+    at          TEXT
+);
+CREATE INDEX IF NOT EXISTS composites_created ON composites (created_at);
+CREATE INDEX IF NOT EXISTS deliveries_session ON deliveries (session_id, kind);
+"""
+
+# "0042-01.jpg" / "0042-composite.jpg"
+_SHOT_RE = re.compile(r"^(\d{4,})-(\d{2})\.\w+$")
+_COMP_RE = re.compile(r"^(\d{4,})-composite\.\w+$")
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _mtime(path: Path) -> str:
+    return datetime.fromtimestamp(path.stat().st_mtime).isoformat(timespec="seconds")
+
+
+def _image_size(path: Path) -> tuple[int | None, int | None]:
+    try:
+        with Image.open(path) as im:  # header only
+            return im.size
+    except Exception:
+        return None, None
+
+
+def _old_path(event_dir: Path, path: str) -> str:
+    # version 1 stored absolute paths; keep the ones under this event relative
+    p = Path(path)
+    try:
+        return str(p.relative_to(event_dir))
+    except ValueError:
+        return path
+
+
+class EventIndex:
+    """One event's index. Safe to share between the UI and worker threads."""
+
+    def __init__(self, event_dir: Path | str):
+        self.event_dir = Path(event_dir)
+        self.path = self.event_dir / INDEX_FILE
+        self.raw_dir = self.event_dir / PHOTO_CONFIG.get("raw_path", "raw")
+        self.comps_dir = self.event_dir / PHOTO_CONFIG.get("composite_path", "comps")
+        self._lock = threading.Lock()
+        self._db = self._open()
+
+    # ---- setup --------------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        self.event_dir.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")  # a crash mid-write loses at most that write
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _open(self) -> sqlite3.Connection:
+        fresh = not self.path.exists()
+        deliveries = []
+        try:
+            db = self._connect()
+            version = db.execute("PRAGMA user_version").fetchone()[0]
+            if fresh or version != SCHEMA_VERSION:
+                if version and version != SCHEMA_VERSION:
+                    deliveries = self._old_deliveries(db)
+                    db.close()
+                    self._discard()
+                    db = self._connect()
+                db.executescript(_SCHEMA)
+                db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+                fresh = True
+            db.execute("SELECT 1 FROM sessions LIMIT 1")
+        except sqlite3.DatabaseError as e:
+            print(f"⚠️ Event index {self.path} is unreadable ({e}), rebuilding it")
+            self._discard()
+            db = self._connect()
+            db.executescript(_SCHEMA)
+            db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            fresh = True
+        self._db = db
+        if fresh:
+            self.rebuild(deliveries)
+        return db
+
+    def _old_deliveries(self, db) -> list[tuple]:
+        try:
+            rows = db.execute(
+                "SELECT session_id, path, kind, target, status, at FROM deliveries"
+            ).fetchall()
+        except sqlite3.DatabaseError:
+            return []
+        return [(s, _old_path(self.event_dir, p), *rest) for s, p, *rest in rows]
+
+    def _rel(self, path) -> str:
+        """How a path is stored: relative to the event folder when it's in it."""
+        p = Path(path)
+        try:
+            return str(p.resolve().relative_to(self.event_dir.resolve()))
+        except ValueError:
+            return str(p)
+
+    def _abs(self, stored: str) -> Path:
+        return self.event_dir / stored  # absolute ones stay as they are
+
+    def _discard(self) -> None:
+        # keep the broken file around for a look, out of the way
+        for suffix in ("", "-wal", "-shm"):
+            p = self.path.with_name(self.path.name + suffix)
+            if p.exists():
+                p.replace(p.with_name(p.name + ".bad"))
+
+    def rebuild(self, deliveries: list[tuple] | None = None) -> None:
+        """Refill sessions, shots and composites from raw/ and comps/.
+
+        Deliveries can't be recovered from disk; the ones already in the
+        index (or passed in) are kept.
+        """
+        print(f"🗂️ Rebuilding event index {self.path}...")
+        shots, comps = [], []
+        sessions: dict[str, str] = {}  # id -> earliest file time
+        for d, regex, out in ((self.raw_dir, _SHOT_RE, shots), (self.comps_dir, _COMP_RE, comps)):
+            if not d.is_dir():
+                continue
+            for p in sorted(d.iterdir()):
+                m = regex.match(p.name)
+                if not m or not p.is_file():
+                    continue
+                sid, at = m.group(1), _mtime(p)
+                sessions[sid] = min(sessions.get(sid, at), at)
+                out.append((m, p, at))
+
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN")
+            try:
+                for table in ("sessions", "shots", "composites"):
+                    db.execute(f"DELETE FROM {table}")
+                db.executemany(
+                    "INSERT INTO sessions (id, started_at) VALUES (?, ?)", sessions.items()
+                )
+                db.executemany(
+                    "INSERT INTO shots (session_id, photo, path, width, height, taken_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (m.group(1), int(m.group(2)), self._rel(p), *_image_size(p), at)
+                        for m, p, at in shots
+                    ],
+                )
+                db.executemany(
+                    "INSERT INTO composites (session_id, path, width, height, created_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    [(m.group(1), self._rel(p), *_image_size(p), at) for m, p, at in comps],
+                )
+                db.executemany(
+                    "UPDATE sessions SET finished_at = ? WHERE id = ?",
+                    [(at, m.group(1)) for m, p, at in comps],
+                )
+                if deliveries:
+                    db.executemany(
+                        "INSERT INTO deliveries (session_id, path, kind, target, status, at)"
+                        " VALUES (?, ?, ?, ?, ?, ?)",
+                        deliveries,
+                    )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        print(f"🗂️ Indexed {len(sessions)} sessions, {len(shots)} shots, {len(comps)} composites")
+
+    def _write(self, sql: str, args: tuple = ()) -> None:
+        try:
+            with self._lock:
+                self._db.execute(sql, args)
+        except sqlite3.DatabaseError as e:
+            # the index is a convenience; never stop a session over it
+            print(f"⚠️ Event index write failed: {e}")
+
+    def _query(self, sql: str, args: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
+
+    # ---- writes, as a session goes along ------------------------------------
+    def start_session(self, session_id: str, template: str | None = None) -> None:
+        self._write(
+            "INSERT OR REPLACE INTO sessions (id, started_at, template) VALUES (?, ?, ?)",
+            (session_id, _now(), template),
+        )
+
+    def add_shot(self, session_id, photo, path, size=None, capture_ms=None) -> None:
+        w, h = size or (None, None)
+        self._write(
+            "INSERT OR REPLACE INTO shots"
+            " (session_id, photo, path, width, height, taken_at, capture_ms)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (session_id, int(photo), self._rel(path), w, h, _now(), capture_ms),
+        )
+
+    def add_composite(self, session_id, path, size=None, render_ms=None, template=None) -> None:
+        w, h = size or (None, None)
+        now = _now()
+        self._write(
+            "INSERT OR REPLACE INTO composites"
+            " (session_id, path, width, height, created_at, render_ms)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (session_id, self._rel(path), w, h, now, render_ms),
+        )
+        self._write(
+            "UPDATE sessions SET finished_at = ?, template = COALESCE(?, template) WHERE id = ?",
+            (now, template, session_id),
+        )
+
+    def add_delivery(self, path, kind: str, status: str, target: str | None = None) -> None:
+        """Record a print or email of the composite at `path`."""
+        if not Path(path).resolve().is_relative_to(self.event_dir.resolve()):
+            return  # e.g. a queued email from another event
+        rel = self._rel(path)
+        self._write(
+            "INSERT INTO deliveries (session_id, path, kind, target, status, at)"
+            " VALUES ((SELECT session_id FROM composites WHERE path = ?), ?, ?, ?, ?, ?)",
+            (rel, rel, kind, target, status, _now()),
+        )
+
+    # ---- queries ------------------------------------------------------------
+    def last_session(self) -> int:
+        """Highest session number in the index (0 if empty)."""
+        row = self._query("SELECT MAX(CAST(id AS INTEGER)) FROM sessions")
+        return int(row[0][0] or 0)
+
+    def composite_paths(self, newest_first: bool = False) -> list[Path]:
+        order = "DESC" if newest_first else "ASC"
+        rows = self._query(
+            f"SELECT path FROM composites ORDER BY created_at {order}, session_id {order}"
+        )
+        return [self._abs(r[0]) for r in rows]
+
+    def session_shots(self, session_id: str) -> list[Path]:
+        rows = self._query(
+            "SELECT path FROM shots WHERE session_id = ? ORDER BY photo", (session_id,)
+        )
+        return [self._abs(r[0]) for r in rows]
+
+    def stats(self) -> dict:
+        """Counts for the event: sessions, shots, composites, prints, emails."""
+        rows = self._query(
+            "SELECT"
+            " (SELECT COUNT(*) FROM sessions),"
+            " (SELECT COUNT(*) FROM shots),"
+            " (SELECT COUNT(*) FROM composites),"
+            " (SELECT COUNT(*) FROM deliveries WHERE kind = 'print' AND status = 'sent'),"
+            " (SELECT COUNT(*) FROM deliveries WHERE kind = 'email' AND status = 'sent'),"
+            " (SELECT AVG(capture_ms) FROM shots),"
+            " (SELECT AVG(render_ms) FROM composites)"
+        )
+        keys = ("sessions", "shots", "composites", "prints", "emails", "avg_capture_ms", "avg_render_ms")
+        return dict(zip(keys, rows[0]))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_index: EventIndex | None = None
+_index_lock = threading.Lock()
+
+
+def event_index() -> EventIndex:
+    """The loaded event's index, opened (and rebuilt if needed) on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = EventIndex(EVENT_LOADED)
+    return _index
@@ -0,0 +1,178 @@
+# app/fonts.py
+# Font lookup for the collage renderer.
+# Resolving a family name used to mean an fc-match subprocess (and maybe an
+# rglob over every font dir) for every text layer on every render. Now the
+# answers live in a small JSON index under CACHE_PATH that is only rebuilt
+# when one of the font directories changes, and loaded fonts are kept around.
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from PIL import ImageFont
+
+from app.config import CACHE_PATH
+
+FONT_INDEX_PATH = CACHE_PATH / "font_index.json"
+
+# common font dirs (macOS/Windows/Linux)
+FONT_DIRS = [
+    Path("/usr/share/fonts"),
+    Path("/usr/local/share/fonts"),
+    Path.home() / ".local/share/fonts",
+    Path("/System/Library/Fonts"),
+    Path("/Library/Fonts"),
+    Path("C:/Windows/Fonts"),
+]
+
+# bump this if the layout of the index file changes
+_INDEX_VERSION = 1
+
+
+@lru_cache(maxsize=64)
+def truetype(path: str, size: int) -> ImageFont.FreeTypeFont:
+    """ImageFont.truetype, but each (path, size) is only loaded once per process."""
+    return ImageFont.truetype(path, size)
+
+
+def _norm(s: str) -> str:
+    return s.replace(" ", "").replace("-", "").lower()
+
+
+def _dirs_signature(dirs: list[Path]) -> dict[str, int]:
+    """mtime of every directory under the font dirs.
+
+    Adding or removing a font touches the mtime of the directory holding it,
+    so this is enough to notice changes without stat'ing every font file.
+    """
+    sig: dict[str, int] = {}
+    for base in dirs:
+        if not base.exists():
+            continue
+        for root, _subdirs, _files in os.walk(base):
+            try:
+                sig[root] = os.stat(root).st_mtime_ns
+            except OSError:
+                continue
+    return sig
+
+
+def _scan_fonts(dirs: list[Path]) -> list[dict]:
+    """Open every .ttf once and record its family/style names."""
+    fonts: list[dict] = []
+    for base in dirs:
+        if not base.exists():
+            continue
+        try:
+            for fp in sorted(base.rglob("*.ttf")):
+                try:
+                    family, style = ImageFont.truetype(str(fp), 12).getname()
+                except Exception:
+                    continue
+                fonts.append(
+                    {"file": str(fp), "family": family or "", "style": style or ""}
+                )
+        except Exception:
+            continue
+    return fonts
+
+
+def _fc_match(family: str, style_str: str | None) -> str | None:
+    # Try fc-match (Linux/RPi typically has it)
+    try:
+        query = family + (f":style={style_str}" if style_str else "")
+        path = subprocess.check_output(
+            ["fc-match", "-f", "%{file}\n", query], text=True
+        ).strip()
+        if path and Path(path).exists():
+            return path
+    except Exception:
+        pass
+    return None
+
+
+class FontIndex:
+    """On-disk family/weight/style → font file index."""
+
+    def __init__(self, path: Path = FONT_INDEX_PATH, dirs: list[Path] | None = None):
+        self.path = Path(path)
+        self.dirs = dirs if dirs is not None else FONT_DIRS
+        self._data: dict | None = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        sig = _dirs_signature(self.dirs)
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") == _INDEX_VERSION and data.get("signature") == sig:
+                return data
+        except (OSError, ValueError):
+            pass
+
+        print("🔤 Building font index...")
+        data = {
+            "version": _INDEX_VERSION,
+            "signature": sig,
+            "fonts": _scan_fonts(self.dirs),
+            "queries": {},
+        }
+        self._save(data)
+        return data
+
+    def _save(self, data: dict) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not write font index {self.path}: {e}")
+
+    def _scan_match(self, family: str, style_str: str | None) -> str | None:
+        assert self._data is not None
+        want = _norm(family)
+        style_words = [_norm(w) for w in (style_str or "").split()]
+
+        # exact family name first, preferring a matching style
+        exact = [f for f in self._data["fonts"] if _norm(f["family"]) == want]
+        for f in exact:
+            if all(w in _norm(f["style"]) for w in style_words):
+                return f["file"]
+
+        # then the old behaviour: family name somewhere in the file name
+        for f in self._data["fonts"]:
+            if want in _norm(Path(f["file"]).stem):
+                return f["file"]
+        return exact[0]["file"] if exact else None
+
+    def lookup(
+        self, family: str, weight: str | None = None, style: str | None = None
+    ) -> str | None:
+        """Return a font file for the family/weight/style, or None."""
+        style_bits = [str(b) for b in (weight, style) if b]
+        style_str = " ".join(style_bits) if style_bits else None
+        key = f"{family}|{style_str or ''}".lower()
+
+        with self._lock:
+            if self._data is None:
+                self._data = self._load()
+
+            # misses are remembered as "" so unknown families stay cheap too
+            if key in self._data["queries"]:
+                hit = self._data["queries"][key]
+                if not hit:
+                    return None
+                if Path(hit).exists():
+                    return hit
+
+            path = _fc_match(family, style_str) or self._scan_match(family, style_str)
+            self._data["queries"][key] = path or ""
+            self._save(self._data)
+            return path
+
+
+FONT_INDEX = FontIndex()
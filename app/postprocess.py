@@ -0,0 +1,140 @@
+# app/postprocess.py
+# Everything that happens to a session after the last shot, off the UI thread.
+#
+# The composite render, the print-ready copy and the screen-sized display
+# copy (what the slideshow shows) are jobs on a small pool of worker
+# threads. Each job has a priority: the current guest's composite goes to
+# the front of the queue, ahead of anything done in the background (like
+# display copies the slideshow asks for), and `finished` is emitted on the UI
+# thread when a job is done. Made once in AppController, like the capture
+# thread.
+#
+# Threads, not processes: Pillow drops the GIL for the heavy parts, and the
+# rendered composite has to stay in this process (app.artifacts) for
+# preview, print and email.
+from __future__ import annotations
+
+import itertools
+import queue
+import threading
+import time
+from pathlib import Path
+
+from PIL import Image, ImageOps
+from PySide6.QtCore import QObject, Signal
+
+from app.artifacts import get_artifact
+from app.config import COLLAGE_CONFIG
+from app.encoder import save_photo
+
+# lower runs first
+PRIORITY_GUEST = 0  # the composite someone is waiting for
+PRIORITY_PRINT = 10  # that guest's print-ready copy
+PRIORITY_BACKGROUND = 20  # display copies etc.
+
+DISPLAY_DIR = "display"  # next to the composites
+
+
+class PostJob:
+    """One queued post-processing job: fn(*args, **kwargs) and what came of it."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, kind: str, priority: int, fn, args: tuple, kwargs: dict, session_id=None):
+        self.id = next(self._ids)
+        self.kind = kind  # "composite" | "print" | "display" | ...
+        self.priority = priority
+        self.session_id = session_id
+        self.fn, self.args, self.kwargs = fn, args, kwargs
+        self.result = None
+        self.error: Exception | None = None
+        self.queued_ns = time.monotonic_ns()
+        self.started_ns: int | None = None
+        self.done_ns: int | None = None
+
+    @property
+    def wait_ms(self) -> float:
+        return (self.started_ns - self.queued_ns) / 1e6 if self.started_ns else 0.0
+
+    @property
+    def run_ms(self) -> float:
+        if self.started_ns is None or self.done_ns is None:
+            return 0.0
+        return (self.done_ns - self.started_ns) / 1e6
+
+
+class PostProcessQueue(QObject):
+    """Priority queue of post-processing jobs on [collage] postprocess_workers threads."""
+
+    finished = Signal(object)  # PostJob, on the UI thread
+
+    def __init__(self, workers: int | None = None, parent=None):
+        super().__init__(parent)
+        workers = int(workers or COLLAGE_CONFIG.get("postprocess_workers", 2))
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._seq = itertools.count()  # FIFO within a priority
+        self._threads = [
+            threading.Thread(target=self._run, name=f"postprocess-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(
+        self, kind: str, fn, *args, priority: int = PRIORITY_BACKGROUND, session_id=None, **kwargs
+    ) -> PostJob:
+        """Queue fn(*args, **kwargs); `finished` fires with the job when it's done."""
+        job = PostJob(kind, priority, fn, args, kwargs, session_id)
+        self._queue.put((priority, next(self._seq), job))
+        return job
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Let the workers finish what they're on; anything still queued is dropped."""
+        for _ in self._threads:
+            self._queue.put((-1, next(self._seq), None))  # ahead of every job
+        for t in self._threads:
+            t.join(timeout)
+
+    def _run(self):
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                break
+            job.started_ns = time.monotonic_ns()
+            try:
+                job.result = job.fn(*job.args, **job.kwargs)
+            except Exception as e:
+                job.error = e
+                print(f"⚠️ {job.kind} job failed: {e}")
+            job.done_ns = time.monotonic_ns()
+            print(
+                f"[postprocess] #{job.id} {job.kind}: waited {job.wait_ms:.0f} ms, "
+                f"ran {job.run_ms:.0f} ms"
+            )
+            self.finished.emit(job)
+
+
+def display_path(composite_path: Path | str) -> Path:
+    """Where the display copy of a composite goes: comps/display/<name>."""
+    p = Path(composite_path)
+    return p.parent / DISPLAY_DIR / p.name
+
+
+def make_display_copy(composite_path: Path | str) -> Path:
+    """Write a screen-sized copy of a composite ([collage] display_size)."""
+    src = Path(composite_path)
+    out = display_path(src)
+    size = tuple(COLLAGE_CONFIG.get("display_size", [800, 1200]))
+    art = get_artifact(src)
+    if art is not None:
+        img = art.image  # fresh composite: skip the decode
+    else:
+        img = Image.open(src)
+        if img.format == "JPEG":
+            img.draft("RGB", size)
+        img = img.convert("RGB")
+    save_photo(ImageOps.contain(img, size, Image.LANCZOS), out)
+    return out
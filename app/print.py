@@ -1,50 +1,79 @@
-import os, subprocess, shlex, tempfile
+import os, subprocess, shlex, tempfile, threading
 from pathlib import Path
 from PIL import Image
+from app.artifacts import get_artifact
 from app.config import PRINTER_CONFIG
 
 LP_BIN = "/usr/bin/lp"  # avoid PATH issues from .desktop launchers
 
+# source path -> (source mtime, printable path), filled by prepare_print()
+_prepared: dict[str, tuple[float, str]] = {}
+_prepared_lock = threading.Lock()
+
+
+def _print_copy(im: Image.Image, src: Path) -> str:
+    # write a baseline (non-progressive) sRGB JPEG to /tmp
+    tmp = Path(tempfile.gettempdir()) / (src.stem + "_print.jpg")
+    # Flatten alpha if present
+    if im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info):
+        bg = Image.new("RGB", im.size, (255, 255, 255))
+        bg.paste(im.convert("RGBA"), mask=im.convert("RGBA").split()[-1])
+        im = bg
+    # Convert CMYK/etc → RGB
+    if im.mode not in ("RGB", "L"):
+        im = im.convert("RGB")
+
+    # Save as **baseline JPEG** (progressive=False), strip ICC
+    im.save(
+        tmp,
+        "JPEG",
+        quality=92,
+        optimize=True,
+        progressive=False,  # <-- key change
+        icc_profile=None,
+    )
+    return str(tmp)
+
 
 def _normalize_for_print(src_path: str) -> str:
     src = Path(src_path)
 
-    # If it's already a baseline RGB JPEG with no alpha, just use it as-is.
-    if src.suffix.lower() in (".jpg", ".jpeg"):
-        try:
-            with Image.open(src) as im:
-                if im.mode in ("RGB", "L"):  # SELPHY accepts RGB JPEG best
-                    # Pillow sets .info.get("progression") True for progressive JPEGs
-                    is_progressive = bool(
-                        im.info.get("progressive") or im.info.get("progression")
-                    )
-                    if not is_progressive:
-                        return str(src)
-        except Exception:
-            pass  # fall through to re-encode
-
-    # Otherwise, write a baseline (non-progressive) sRGB JPEG to /tmp
-    tmp = Path(tempfile.gettempdir()) / (src.stem + "_print.jpg")
+    # Fresh composite still in memory: no need to open the file at all.
+    art = get_artifact(src)
+    if art is not None:
+        if art.print_ready:
+            return str(src)
+        return _print_copy(art.image, src)
+
     with Image.open(src) as im:
-        # Flatten alpha if present
-        if im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info):
-            bg = Image.new("RGB", im.size, (255, 255, 255))
-            bg.paste(im.convert("RGBA"), mask=im.convert("RGBA").split()[-1])
-            im = bg
-        # Convert CMYK/etc → RGB
-        if im.mode not in ("RGB", "L"):
-            im = im.convert("RGB")
-
-        # Save as **baseline JPEG** (progressive=False), strip ICC
-        im.save(
-            tmp,
-            "JPEG",
-            quality=92,
-            optimize=True,
-            progressive=False,  # <-- key change
-            icc_profile=None,
-        )
-    return str(tmp)
+        # If it's already a baseline RGB JPEG with no alpha, just use it as-is.
+        if src.suffix.lower() in (".jpg", ".jpeg") and im.mode in ("RGB", "L"):
+            # SELPHY accepts RGB JPEG best
+            # Pillow sets .info.get("progression") True for progressive JPEGs
+            is_progressive = bool(
+                im.info.get("progressive") or im.info.get("progression")
+            )
+            if not is_progressive:
+                return str(src)
+        return _print_copy(im, src)
+
+
+def prepare_print(image_path) -> str:
+    """Normalize `image_path` for the printer now and remember the result.
+
+    Run in the background after a composite is made (see app.postprocess),
+    so pressing Print only has to hand the file to CUPS.
+    """
+    src = Path(image_path)
+    mtime = src.stat().st_mtime
+    with _prepared_lock:
+        hit = _prepared.get(str(src))
+    if hit is not None and hit[0] == mtime and Path(hit[1]).exists():
+        return hit[1]
+    printable = _normalize_for_print(str(src))
+    with _prepared_lock:
+        _prepared[str(src)] = (mtime, printable)
+    return printable
 
 
 def send_to_printer(image_path):
@@ -58,8 +87,8 @@ def send_to_printer(image_path):
         print(f"⚠️ File not found: {src}")
         return False
 
-    # 1) normalize to JPEG
-    printable = _normalize_for_print(str(src))
+    # 1) normalize to JPEG (usually done already, right after the render)
+    printable = prepare_print(src)
     size = Path(printable).stat().st_size
     print(f"[print.py] printable={printable} ({size} bytes)")
 
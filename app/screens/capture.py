@@ -1,37 +1,32 @@
 from pathlib import Path
-import re
+import time
 
 from PySide6.QtGui import QPixmap, QImage
-from PySide6.QtCore import Qt, QTimer, QSize, QThread, QObject, Signal
+from PySide6.QtCore import Qt, QTimer, QSize
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QStackedLayout, QApplication, QGraphicsDropShadowEffect
 
-from app.collage import generate_collage
-from app.config import PHOTO_CONFIG, EVENT_LOADED
+from app.collage import IncrementalCollage, generate_collage
+from app.artifacts import get_artifact
+from app.config import CAMERA_CONFIG, PHOTO_CONFIG, PRINTER_CONFIG, EVENT_LOADED
+from app.event_index import event_index
+from app.postprocess import PRIORITY_GUEST, PRIORITY_PRINT, make_display_copy
+from app.print import prepare_print
+from app.session_counter import next_session_id
+from app.timing import ShotTrace
 import app.lights
 
 
-class _CaptureWorker(QObject):
-    done = Signal(object, object)  # (photo_path: Path|None, error: Exception|None)
-
-    def __init__(self, controller, photo_path):
-        super().__init__()
-        self.controller = controller
-        self.photo_path = photo_path
-
-    def run(self):
-        try:
-            self.controller.camera.capture(str(self.photo_path))
-            self.done.emit(self.photo_path, None)
-        except Exception as e:
-            self.done.emit(None, e)
-
-
 class CaptureScreen(QWidget):
     def __init__(self, controller):
         super().__init__()
         self.controller = controller
-        self._cap_thread = None
-        self._cap_worker = None
+        # shots run on the app's capture thread; results come back here
+        self.controller.capture_service.done.connect(self._capture_done)
+        self._shot_job = None  # the shot we're waiting on
+        # the composite renders on the post-processing queue
+        self.controller.postprocess.finished.connect(self._composite_done)
+        self._composite_job = None
+        self._composite_template = None
         self.photo_index = 0
         self.photo_paths: list[Path] = []
         self.photos_to_take = PHOTO_CONFIG.get("count", 3)
@@ -45,6 +40,8 @@ class CaptureScreen(QWidget):
         self.comps_dir: Path | None = None
         self.capture_session_id: str | None = None
         self.logo_path: Path | None = None
+        # collage slots are prepared in the background as each shot lands
+        self._collage: IncrementalCollage | None = None
 
         # Layout with stacked overlay (preview + countdown overlay)
         layout = QVBoxLayout()
@@ -83,28 +80,38 @@ class CaptureScreen(QWidget):
         self.countdown_timer = QTimer(self)
         self.countdown_timer.timeout.connect(self.update_countdown)
 
-    def _start_capture_async(self, photo_path: Path):
-        # spin worker thread so UI can paint the white flash
-        self._cap_thread = QThread(self)
-        self._cap_worker = _CaptureWorker(self.controller, photo_path)
-        self._cap_worker.moveToThread(self._cap_thread)
-        self._cap_worker.done.connect(self._capture_done)
-        self._cap_thread.started.connect(self._cap_worker.run)
-        self._cap_thread.start()
+        # first countdown waits for AE/AWB/AF to settle, up to warmup_timeout
+        self.warmup_timeout = float(CAMERA_CONFIG.get("warmup_timeout", 3.0))
+        self._warmup_t0 = 0.0
+        self.warmup_timer = QTimer(self)
+        self.warmup_timer.timeout.connect(self._check_warmup)
+
+        # per-shot shutter timestamps, one trace file per session
+        self.shutter_trace = bool(CAMERA_CONFIG.get("shutter_trace", False))
+        self.trace_dir = CAMERA_CONFIG.get("shutter_trace_dir", "trace")
+
+    def _start_capture_async(
+        self, photo_path: Path, trigger_ns: int | None = None, trace: ShotTrace | None = None
+    ):
+        # queued on the capture thread so the UI can paint the white flash
+        trace_path = EVENT_LOADED / self.trace_dir / f"{self.capture_session_id}-shutter.jsonl"
+        keep_size = self._collage.next_slot_size() if self._collage is not None else None
+        self._shot_job = self.controller.capture_service.shot(
+            photo_path, trigger_ns, trace, trace_path, keep_size
+        )
+
+    def _capture_done(self, job):
+        if job is not self._shot_job:
+            return  # camera calls, or someone else's shots
+        self._shot_job = None
+        photo_path, err, image = job.path, job.error, job.image
 
-    def _capture_done(self, photo_path: Path | None, err: Exception | None):
         # restore preview image after capture
         if self._last_preview_pixmap is not None:
             self.preview_label.setPixmap(self._last_preview_pixmap)
 
-        # cleanup thread objects
-        if self._cap_thread:
-            self._cap_thread.quit()
-            self._cap_thread.wait()
-            self._cap_worker.deleteLater()
-            self._cap_thread.deleteLater()
-            self._cap_thread = None
-            self._cap_worker = None
+        # release the buffered frames until the next countdown
+        self._camera_call("zsl_stop")
 
         # continue original flow
         photo_num = self.photo_index + 1
@@ -113,6 +120,15 @@ class CaptureScreen(QWidget):
         else:
             self.photo_paths.append(photo_path)
             print(f"Photo {photo_num} saved to {photo_path}")
+            if self._collage is not None:
+                self._collage.add_shot(photo_path, image)
+            event_index().add_shot(
+                self.capture_session_id,
+                photo_num,
+                photo_path,
+                job.size,
+                job.capture_ms,
+            )
 
         self.photo_index += 1
         if self.photo_index < self.photos_to_take:
@@ -126,27 +142,48 @@ class CaptureScreen(QWidget):
             except Exception:
                 pass
             assert self.comps_dir is not None
+            assert self._collage is not None
             composite_path = self.comps_dir / f"{self.capture_session_id}-composite.jpg"
-            generate_collage(
-                self.photo_paths,
+            # render off the UI thread, ahead of any background work
+            collage, self._collage = self._collage, None
+            self.preview_label.setText("🎨 Creating your photo...")
+            self._composite_job = self.controller.postprocess.submit(
+                "composite",
+                collage.finish,
                 composite_path,
-                logo_path=self.logo_path,
                 config=self.controller.config.get("collage", {}),
+                priority=PRIORITY_GUEST,
+                session_id=self.capture_session_id,
             )
-            self.controller.preview_screen.load_photo(str(composite_path))
-            self.controller.go_to(self.controller.preview_screen)
-
-    def get_next_capture_session_id(self, raw_dir: Path) -> str:
-        existing_files = [p.name for p in raw_dir.iterdir() if p.is_file()]
-        session_numbers: list[int] = []
+            self._composite_template = collage.template_path.parent.name
+
+    def _composite_done(self, job):
+        if job is not self._composite_job:
+            return  # print/display copies, older sessions
+        self._composite_job = None
+        if job.error is not None:
+            print(f"Collage failed: {job.error}")
+            self.controller.go_to(self.controller.idle_screen)
+            return
 
-        for fname in existing_files:
-            m = re.match(r"^(\d{4})-\d{2}\.\w+$", fname)
-            if m:
-                session_numbers.append(int(m.group(1)))
+        composite_path = job.result
+        art = get_artifact(composite_path)
+        event_index().add_composite(
+            job.session_id,
+            composite_path,
+            art.size if art is not None else None,
+            job.run_ms,
+            template=self._composite_template,
+        )
+        self.controller.preview_screen.load_photo(str(composite_path))
+        self.controller.go_to(self.controller.preview_screen)
 
-        next_id = (max(session_numbers) if session_numbers else 0) + 1
-        return f"{next_id:04d}"
+        # while the guest looks at it: the print-ready copy, then the
+        # slideshow's display copy
+        queue = self.controller.postprocess
+        if PRINTER_CONFIG.get("enabled", False):
+            queue.submit("print", prepare_print, composite_path, priority=PRIORITY_PRINT)
+        queue.submit("display", make_display_copy, composite_path)
 
     # rewrite this to reference config paths...
     def prepare_capture_paths(self) -> bool:
@@ -161,7 +198,13 @@ class CaptureScreen(QWidget):
         self.comps_dir = session_path / self.comp_subfolder
         self.comps_dir.mkdir(parents=True, exist_ok=True)
 
-        self.capture_session_id = self.get_next_capture_session_id(self.raw_dir)
+        # counter file in the event folder; the event index (or raw/ and
+        # comps/) is only looked at if it's missing or broken
+        index = event_index()
+        self.capture_session_id = next_session_id(
+            session_path, [self.raw_dir, self.comps_dir], last_known=index.last_session
+        )
+        index.start_session(self.capture_session_id)
 
         logo_filename = self.controller.config["collage"].get("logo_filename", "")
         self.logo_path = (session_path / logo_filename) if logo_filename else None
@@ -179,26 +222,63 @@ class CaptureScreen(QWidget):
 
         if not self.prepare_capture_paths():
             return
+        self._collage = IncrementalCollage()
 
+        # have the camera deliver preview frames at the size we show them
+        self.controller.camera.set_preview_size(self._preview_target())
+        # no-op if the camera is still running from the last session
         self.controller.camera.start_camera()
         self.preview_timer.start(50)  # ~20 FPS
 
-        QTimer.singleShot(2000, self.begin_countdown)
+        # a warm camera passes on the first check, but only on this
+        # session's frames
+        self.controller.camera.reset_convergence()
+        self._warmup_t0 = time.monotonic()
+        self.warmup_timer.start(100)
+        QTimer.singleShot(0, self._check_warmup)
+
+    def _check_warmup(self):
+        if not self.warmup_timer.isActive():
+            return  # already started
+        waited = time.monotonic() - self._warmup_t0
+        try:
+            ready = self.controller.camera.converged()
+        except Exception as e:
+            print(f"⚠️ camera.converged failed: {e}")
+            ready = False
+        if not ready and waited < self.warmup_timeout:
+            return
+        self.warmup_timer.stop()
+        note = "" if ready else " (timed out waiting for AE/AWB/AF)"
+        print(f"[camera] ready after {waited * 1000:.0f} ms{note}")
+        self.begin_countdown()
+
+    def _preview_target(self) -> tuple[int, int]:
+        # live preview fills ~75% of available area
+        cont_size = self.preview_container.size()
+        return (
+            max(1, int(cont_size.width() * 0.75)),
+            max(1, int(cont_size.height() * 0.75)),
+        )
 
     def update_preview(self):
         frame = self.controller.camera.get_qt_preview_frame()
         if frame:
-            # Scale live preview to ~75% of available area, keep aspect ratio
-            cont_size = self.preview_container.size()
-            target = QSize(
-                max(1, int(cont_size.width() * 0.75)),
-                max(1, int(cont_size.height() * 0.75)),
-            )
-            scaled_img = frame.scaled(target, Qt.KeepAspectRatio, Qt.FastTransformation)
-            pixmap = QPixmap.fromImage(scaled_img)
+            # frames normally arrive at display size already; only scale
+            # (keeping aspect ratio) if the widget has changed since
+            target = QSize(*self._preview_target())
+            fitted = frame.size().scaled(target, Qt.KeepAspectRatio)
+            if abs(fitted.width() - frame.width()) > 2:  # not just even-size rounding
+                frame = frame.scaled(target, Qt.KeepAspectRatio, Qt.FastTransformation)
+            pixmap = QPixmap.fromImage(frame)
             self.preview_label.setPixmap(pixmap)
             self._last_preview_pixmap = pixmap
 
+    def _camera_call(self, name: str) -> None:
+        # optional camera extras, run in turn with the shots on the capture
+        # thread; a failure is only logged, it must not stop the session
+        self.controller.capture_service.call(name)
+
     def begin_countdown(self):
         # Ensure countdown label is on top of the stack
         if hasattr(self, "preview_stack"):
@@ -210,6 +290,8 @@ class CaptureScreen(QWidget):
             pass
         self.count = self.countdown_seconds
         self.countdown_label.setText(str(self.count))
+        # zero shutter lag: start buffering frames for the "0"
+        self._camera_call("zsl_start")
         self.countdown_timer.start(1000)
 
     def update_countdown(self):
@@ -218,7 +300,8 @@ class CaptureScreen(QWidget):
             self.countdown_label.setText(str(self.count))
             return
 
-        # time to shoot
+        # time to shoot; with ZSL the frame nearest this moment is the photo
+        trigger_ns = time.monotonic_ns()
         self.countdown_timer.stop()
         self.countdown_label.setText("")
         self.preview_stack.setCurrentWidget(self.preview_label)
@@ -229,12 +312,19 @@ class CaptureScreen(QWidget):
         filename = f"{self.capture_session_id}-{photo_num:02d}.{self.format}"
         photo_path = self.raw_dir / filename
 
+        trace = None
+        if self.shutter_trace:
+            trace = ShotTrace(session_id=self.capture_session_id, photo=photo_num)
+            trace.mark("countdown_zero", trigger_ns)
+
         if self._last_preview_pixmap is not None:
             # Lights: capture moment
             try:
                 app.lights.mode_capture(fade=False)
             except Exception:
                 pass
+            if trace is not None:
+                trace.mark("lights_capture")
             # 1) flash white and force a paint *before* capture starts
             size = self._last_preview_pixmap.size()
             white_img = QImage(size, QImage.Format_ARGB32)
@@ -242,12 +332,14 @@ class CaptureScreen(QWidget):
             white_pixmap = QPixmap.fromImage(white_img)
             self.preview_label.setPixmap(white_pixmap)
             QApplication.processEvents()  # let the white actually hit the screen
+            if trace is not None:
+                trace.mark("flash_painted")
 
             # 2) kick off capture off the UI thread
-            self._start_capture_async(photo_path)
+            self._start_capture_async(photo_path, trigger_ns, trace)
         else:
             # no preview yet; just capture async
-            self._start_capture_async(photo_path)
+            self._start_capture_async(photo_path, trigger_ns, trace)
 
     def take_photo(self):
         assert self.raw_dir is not None
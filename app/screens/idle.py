@@ -16,7 +16,7 @@ class IdleScreen(QWidget):
         self.setBaseSize(480, 640)
 
         # Slideshow..
-        self.slideshow = SlideshowWidget(self)
+        self.slideshow = SlideshowWidget(self, postprocess=controller.postprocess)
         ssw = self.width()
         ssh = self.height()
 
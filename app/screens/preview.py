@@ -11,13 +11,23 @@ from PySide6.QtWidgets import (
     QSizePolicy,
     QSpacerItem,
 )
-from PySide6.QtGui import QPixmap, QGuiApplication
+from PySide6.QtGui import QPixmap, QGuiApplication, QImage
 from PySide6.QtCore import Qt, QTimer
 
+from app.artifacts import get_artifact
+from app.config import PRINTER_CONFIG
 from app.emailer import send_email
+from app.event_index import event_index
 from app.print import send_to_printer
 
 
+def _pixmap_from_pil(img) -> QPixmap:
+    rgb = img if img.mode == "RGB" else img.convert("RGB")
+    data = rgb.tobytes()
+    qimg = QImage(data, rgb.width, rgb.height, 3 * rgb.width, QImage.Format_RGB888)
+    return QPixmap.fromImage(qimg)  # copies, so `data` can go
+
+
 class PreviewScreen(QWidget):
     def __init__(self, controller):
         super().__init__()
@@ -135,9 +145,14 @@ class PreviewScreen(QWidget):
     def load_photo(self, filepath: str | Path) -> None:
         path = Path(filepath)
         self.current_photo_path = path
-        if path.exists():
-            # QPixmap accepts str; using str() avoids Windows backslash escape issues elsewhere
-            self.original_pixmap = QPixmap(str(path))
+        art = get_artifact(path)
+        if art is not None or path.exists():
+            if art is not None:
+                # straight from the rendered image, no JPEG decode
+                self.original_pixmap = _pixmap_from_pil(art.image)
+            else:
+                # QPixmap accepts str; using str() avoids Windows backslash escape issues elsewhere
+                self.original_pixmap = QPixmap(str(path))
             self.update_photo_label()
             # Reset UI for new session
             self.print_group.setVisible(True)
@@ -169,13 +184,18 @@ class PreviewScreen(QWidget):
         self.print_no_btn.setVisible(False)
         self.print_status.setVisible(True)
         if self.current_photo_path:
+            path = self.current_photo_path
             def _do_print():
+                ok = False
                 try:
-                    ok = send_to_printer(str(self.current_photo_path))
+                    ok = send_to_printer(str(path))
                     if not ok:
                         print("Print failed.")
                 except Exception as e:
                     print(f"Print error: {e}")
+                event_index().add_delivery(
+                    path, "print", "sent" if ok else "failed", PRINTER_CONFIG.get("printer_name")
+                )
             threading.Thread(target=_do_print, daemon=True).start()
         else:
             print("No photo to print.")
@@ -222,11 +242,15 @@ class PreviewScreen(QWidget):
         QTimer.singleShot(2000, lambda: self.controller.go_to(self.controller.idle_screen))
         # Send in background to avoid UI lag
         if self.current_photo_path:
+            path = self.current_photo_path
             def _do_send():
+                status = "failed"
                 try:
-                    send_email(to_email, str(self.current_photo_path))
+                    # a failed send goes to the email queue for a retry
+                    status = "sent" if send_email(to_email, str(path)) else "queued"
                 except Exception as e:
                     print(f"Email error: {e}")
+                event_index().add_delivery(path, "email", status, to_email)
             threading.Thread(target=_do_send, daemon=True).start()
         QTimer.singleShot(2000, lambda: self.controller.go_to(self.controller.idle_screen))
 
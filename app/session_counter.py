@@ -0,0 +1,101 @@
+# app/session_counter.py
+# Session numbers for an event without listing the raw folder.
+#
+# The last number handed out is kept in <event>/session_counter.json. Each
+# START reads it, adds one and writes it back (temp file, fsync, rename), so
+# after a crash or power cut the file holds either the old number or the new
+# one, never half of one. Only when the file is missing or unreadable is it
+# rebuilt: from the event index (app.event_index) if there is one, else by
+# scanning raw/ and comps/ for the highest session on disk. Then the counter
+# is written again so that doesn't repeat.
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Callable
+
+COUNTER_FILE = "session_counter.json"
+
+# "0042-01.jpg", "0042-composite.jpg", ...
+_SESSION_RE = re.compile(r"^(\d{4,})-")
+
+_lock = threading.Lock()
+
+
+def scan_last_session(*dirs: Path) -> int:
+    """Highest session number among the files in `dirs` (0 if none)."""
+    last = 0
+    for d in dirs:
+        if d is None or not Path(d).is_dir():
+            continue
+        with os.scandir(d) as it:
+            for entry in it:
+                m = _SESSION_RE.match(entry.name)
+                if m and entry.is_file():
+                    last = max(last, int(m.group(1)))
+    return last
+
+
+def _read(path: Path) -> int | None:
+    try:
+        last = json.loads(path.read_text(encoding="utf-8"))["last"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return last if isinstance(last, int) and last >= 0 else None
+
+
+def _write(path: Path, last: int) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write(json.dumps({"last": last}))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    # and the rename itself (POSIX only; Windows can't open a directory)
+    try:
+        fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def next_session_id(
+    event_dir: Path,
+    scan_dirs: list[Path] | None = None,
+    last_known: Callable[[], int] | None = None,
+) -> str:
+    """Allocate the next session id ("0001", "0002", ...) for `event_dir`.
+
+    Only when the counter has to be rebuilt: `last_known` (e.g.
+    EventIndex.last_session) gives the highest session number, or failing
+    that `scan_dirs` (default <event>/raw) are listed.
+    """
+    event_dir = Path(event_dir)
+    path = event_dir / COUNTER_FILE
+    with _lock:
+        last = _read(path)
+        if last is None:
+            if path.exists():
+                print(f"⚠️ Session counter {path} is unreadable, rebuilding it")
+            last = None
+            if last_known is not None:
+                try:
+                    last = last_known()
+                except Exception as e:
+                    print(f"⚠️ Could not ask the event index for the last session: {e}")
+            if last is None:
+                last = scan_last_session(*(scan_dirs or [event_dir / "raw"]))
+        last += 1
+        try:
+            event_dir.mkdir(parents=True, exist_ok=True)
+            _write(path, last)
+        except OSError as e:
+            # still hand out the id; next time falls back to the scan
+            print(f"⚠️ Could not save session counter {path}: {e}")
+    return f"{last:04d}"
@@ -0,0 +1,101 @@
+# app/timing.py
+# Lightweight wall-clock timing for the render pipeline.
+# Pass a Timeline into the code you want measured; code that gets None
+# skips timing entirely (see span()).
+# ShotTrace is the shutter-side counterpart: absolute timestamps for one
+# photo from the countdown's 0 to the file on disk (see shutter_report.py).
+from __future__ import annotations
+
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+
+class Timeline:
+    """Collects {"phase", "ms", ...} records, safe to share between threads."""
+
+    def __init__(self):
+        self.records: list[dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, ms: float, **fields) -> None:
+        rec = {"phase": phase, "ms": round(ms, 3), **fields}
+        with self._lock:
+            self.records.append(rec)
+
+    @contextmanager
+    def span(self, phase: str, **fields):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, (time.perf_counter() - t0) * 1000.0, **fields)
+
+    def write_jsonl(self, path: Path | str, **context) -> None:
+        """Append every record to `path` as one JSON line, tagged with `context`.
+
+        e.g. write_jsonl(log, session_id="0007", template="default")
+        """
+        path = Path(path)
+        with self._lock:
+            records = list(self.records)
+        lines = [json.dumps({**context, **rec}) for rec in records]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+
+
+def span(timeline: Timeline | None, phase: str, **fields):
+    """timeline.span(...) or a no-op when there is no timeline."""
+    if timeline is None:
+        return nullcontext()
+    return timeline.span(phase, **fields)
+
+
+# shutter path of one shot, in the order things should happen
+SHOT_MARKS = (
+    "countdown_zero",  # countdown hit 0 (the trigger)
+    "lights_capture",  # lights.mode_capture() returned
+    "flash_painted",  # white flash pushed to the screen
+    "request_issued",  # camera asked for the frame
+    "sensor_exposure",  # exposure start of the frame used (SensorTimestamp)
+    "frame_grabbed",  # photo in memory
+    "file_written",  # photo saved
+)
+
+_trace_lock = threading.Lock()
+
+
+class ShotTrace:
+    """time.monotonic_ns() marks for one shot, set from whichever thread gets there.
+
+    Marks are absolute, so the UI, the capture worker, the encoder and the
+    camera service (same system-wide clock) can all add theirs.
+    """
+
+    def __init__(self, **fields):
+        self.fields = fields  # session_id, photo, ...
+        self.marks: dict[str, int] = {}
+
+    def mark(self, event: str, ns: int | None = None) -> None:
+        self.marks[event] = int(ns) if ns is not None else time.monotonic_ns()
+
+    def record(self) -> dict:
+        """{**fields, "marks": {event: ns}, "ms": {event: ms after countdown_zero}}"""
+        order = {m: i for i, m in enumerate(SHOT_MARKS)}
+        marks = dict(sorted(self.marks.items(), key=lambda kv: order.get(kv[0], len(order))))
+        rec = {**self.fields, "marks": marks}
+        zero = marks.get(SHOT_MARKS[0])
+        if zero is not None:
+            rec["ms"] = {k: round((v - zero) / 1e6, 3) for k, v in marks.items()}
+        return rec
+
+    def write_jsonl(self, path: Path | str, **context) -> None:
+        """Append this shot to `path` as one JSON line, tagged with `context`."""
+        path = Path(path)
+        line = json.dumps({**context, **self.record()})
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _trace_lock, path.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
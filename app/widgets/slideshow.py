@@ -6,11 +6,16 @@ from PySide6.QtWidgets import QWidget, QLabel, QStackedLayout, QGraphicsOpacityE
 from PySide6.QtGui import QPixmap
 
 from app.config import EVENT_COMPS, IDLE_CONFIG  # EVENT_COMPS should be a Path
+from app.event_index import event_index
+from app.postprocess import display_path, make_display_copy
 
 
 class SlideshowWidget(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, postprocess=None):
         super().__init__(parent)
+        # PostProcessQueue for display copies of composites that don't have one yet
+        self._postprocess = postprocess
+        self._requested: set[Path] = set()
 
         # Config
         self.transition_time = IDLE_CONFIG.get("transition_time", 5000)   # ms
@@ -24,8 +29,8 @@ class SlideshowWidget(QWidget):
             "stack": self.stack_transition,
         }
 
-        # Load image paths (JPGs in EVENT_COMPS)
-        self.image_paths: list[Path] = sorted(Path(EVENT_COMPS).glob("*.jpg"))
+        # Load image paths (the event's composites)
+        self.image_paths: list[Path] = self._composite_paths()
         self.current_index = 0
 
         # Stack with two labels
@@ -54,9 +59,16 @@ class SlideshowWidget(QWidget):
         # keep a reference to animations so they don't get GC'd
         self._anims: list[QPropertyAnimation] = []
 
+    def _composite_paths(self) -> list[Path]:
+        # indexed query; only list the folder if the index can't be read
+        try:
+            return event_index().composite_paths()
+        except Exception as e:
+            print(f"⚠️ Event index unavailable, listing {EVENT_COMPS}: {e}")
+            return sorted(Path(EVENT_COMPS).glob("*.jpg"))
+
     def refresh_images(self, shuffle: bool = True) -> None:
-        base = Path(EVENT_COMPS)
-        paths = sorted(base.glob("*.jpg"))
+        paths = self._composite_paths()
         if shuffle:
             random.shuffle(paths)
         self.image_paths = paths
@@ -64,11 +76,28 @@ class SlideshowWidget(QWidget):
         self.current_index = 0 if self.image_paths else -1
         if self.image_paths:
             current_label = self.stack.currentWidget() or self.label1
-            pm = QPixmap(str(self.image_paths[0]))
+            pm = self._pixmap(self.image_paths[0])
             current_label.setPixmap(self._scaled(pm, current_label))
             self.stack.setCurrentWidget(current_label)
 
     # ---- helpers ------------------------------------------------------------
+    def _pixmap(self, path: Path) -> QPixmap:
+        # the screen-sized copy when it's been made, else the full composite
+        small = display_path(path)
+        if small.exists():
+            return QPixmap(str(small))
+        self._request_display_copy(path)
+        return QPixmap(str(path))
+
+    def _request_display_copy(self, path: Path) -> None:
+        # one background job per composite, as the slideshow gets to it
+        if self._postprocess is None or path in self._requested:
+            return
+        if display_path(path).exists():
+            return
+        self._requested.add(path)
+        self._postprocess.submit("display", make_display_copy, path)
+
     def _scaled(self, pixmap: QPixmap, label: QLabel) -> QPixmap:
         if pixmap.isNull():
             return pixmap
@@ -88,10 +117,10 @@ class SlideshowWidget(QWidget):
         # Establish stable target size now that layout has run
         self._target_w, self._target_h = max(1, self.width()), max(1, self.height())
         # Preload first (and second, if present) with correct scaling
-        first_pm = QPixmap(str(self.image_paths[0]))
+        first_pm = self._pixmap(self.image_paths[0])
         self.label1.setPixmap(self._scaled(first_pm, self.label1))
         if len(self.image_paths) > 1:
-            second_pm = QPixmap(str(self.image_paths[1]))
+            second_pm = self._pixmap(self.image_paths[1])
             self.label2.setPixmap(self._scaled(second_pm, self.label2))
         self.stack.setCurrentWidget(self.label1)
         # Start timer only after first frame is properly sized
@@ -103,13 +132,16 @@ class SlideshowWidget(QWidget):
             return
 
         self.current_index = (self.current_index + 1) % len(self.image_paths)
-        next_pm = QPixmap(str(self.image_paths[self.current_index]))
+        next_pm = self._pixmap(self.image_paths[self.current_index])
 
         current_label = self.stack.currentWidget()
         next_label = self.label1 if current_label is self.label2 else self.label2
 
         next_label.setPixmap(self._scaled(next_pm, next_label))
         self.stack.setCurrentWidget(next_label)
+        # get the one after ready while this one is up
+        upcoming = (self.current_index + 1) % len(self.image_paths)
+        self._request_display_copy(self.image_paths[upcoming])
 
         # Force the very first transition to be instant to avoid odd first-time effects
         if not self._first_transition_done:
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Collage rendering benchmark.
+
+Run: python bench_collage.py [options]
+
+Renders each template with synthetic shots at each capture resolution and
+reports decode / per-layer / total wall time plus peak RSS. Results are
+compared against a stored baseline; anything slower than the threshold, or
+a peak RSS above the RSS threshold, exits non-zero so it can gate changes
+to the composite path.
+
+Options:
+  --template PATH         template.toml to run (repeatable; default: the
+                          default style + templates/photo/classy-4x6)
+  --resolution WxH        synthetic shot size (repeatable; default 2304x1296)
+  --runs N                timed runs per case (default 5, after 1 warm-up)
+  --baseline PATH         baseline JSON (default: <cache_path>/bench_collage.json)
+  --update-baseline       store this run as the new baseline
+  --threshold F           allowed slowdown, 0.15 = 15% (default 0.15)
+  --rss-threshold F       allowed peak RSS growth, 0.10 = 10% (default 0.10)
+
+Each case runs in its own process so peak RSS is per case.
+
+The default baseline lives in the machine-local cache ([settings]
+cache_path, app/cache) and goes when the cache is cleared. Numbers only
+mean something on the machine they were taken on, so to keep one for a
+booth, write it somewhere that stays, e.g.
+  python bench_collage.py --baseline ~/phototron-bench.json --update-baseline
+and pass the same --baseline on later runs.
+"""
+import argparse
+import json
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+from app.config import APP_ROOT, CACHE_PATH
+
+DEFAULT_TEMPLATES = [
+    APP_ROOT / "app" / "styles" / "default" / "template.toml",
+    APP_ROOT / "app" / "templates" / "photo" / "classy-4x6" / "template.toml",
+]
+DEFAULT_BASELINE = CACHE_PATH / "bench_collage.json"
+
+# per-phase regressions smaller than this are timer noise, not slowdowns
+MIN_DELTA_MS = 5.0
+# same for peak RSS (allocator / import noise)
+MIN_DELTA_MB = 5.0
+
+
+def synthetic_shot(path: Path, size: tuple[int, int], seed: int) -> None:
+    """Write a deterministic photo-like JPEG (gradients + noise)."""
+    import numpy as np
+    from PIL import Image
+
+    w, h = size
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 1, w, dtype=np.float32)[None, :]
+    y = np.linspace(0, 1, h, dtype=np.float32)[:, None]
+    rgb = np.empty((h, w, 3), dtype=np.float32)
+    rgb[..., 0] = 200 * x + 30 * y
+    rgb[..., 1] = 160 * y + 40 * (1 - x)
+    rgb[..., 2] = 120 * (1 - y) + 60 * x * y + 20 * seed
+    rgb += rng.normal(0, 12, size=rgb.shape).astype(np.float32)
+    img = Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8), "RGB")
+    img.save(path, quality=90)
+
+
+def _layer_key(rec: dict) -> str:
+    if rec["phase"] == "layer":
+        return f"layer{rec['index']}:{rec['type']}" + (
+            f":{rec['name']}" if rec.get("name") else ""
+        )
+    if rec.get("stage"):
+        return f"{rec['phase']}:{rec['name']}:{rec['stage']}"
+    if rec.get("name"):
+        return f"{rec['phase']}:{rec['name']}"
+    return rec["phase"]
+
+
+def run_case(template: str, resolution: tuple[int, int], runs: int) -> dict:
+    """Runs in a child process; returns medians in ms and peak RSS in MB."""
+    from app.collage import open_shot
+    from app.collage_renderer import load_template, render_collage
+    from app.timing import Timeline
+
+    tmp = Path(tempfile.mkdtemp(prefix="phototron-bench-"))
+    paths = []
+    for i in range(3):
+        p = tmp / f"0001-{i + 1:02d}.jpg"
+        synthetic_shot(p, resolution, i)
+        paths.append(p)
+
+    samples: dict[str, list[float]] = {}
+    for n in range(runs + 1):  # first pass warms template/font/plate caches
+        tl = Timeline()
+        t0 = time.perf_counter()
+        ct = load_template(template)
+        shots = {}
+        for i, p in enumerate(paths, start=1):
+            with tl.span("decode", name=f"shot{i}"):
+                shots[f"shot{i}"] = open_shot(p, ct.slot_size(f"shot{i}"))
+        render_collage(template, shots, {}, tmp / "composite.jpg", timeline=tl)
+        total = (time.perf_counter() - t0) * 1000.0
+        if n == 0:
+            continue
+        per_key: dict[str, float] = {}
+        for rec in tl.records:
+            key = _layer_key(rec)
+            per_key[key] = per_key.get(key, 0.0) + rec["ms"]
+        per_key["total"] = total
+        for key, ms in per_key.items():
+            samples.setdefault(key, []).append(ms)
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "phases": {k: round(statistics.median(v), 2) for k, v in samples.items()},
+        "peak_rss_mb": round(peak_kb / 1024.0, 1),
+    }
+
+
+def _parse_resolution(s: str) -> tuple[int, int]:
+    w, h = s.lower().split("x")
+    return int(w), int(h)
+
+
+def compare(result: dict, base: dict, threshold: float, rss_threshold: float = 0.10) -> list[str]:
+    problems = []
+    for key, ms in result["phases"].items():
+        old = base.get("phases", {}).get(key)
+        if old is None:
+            continue
+        if ms > old * (1.0 + threshold) and ms - old > MIN_DELTA_MS:
+            problems.append(f"{key}: {old:.1f} → {ms:.1f} ms (+{(ms / old - 1) * 100:.0f}%)")
+    mb, old = result.get("peak_rss_mb"), base.get("peak_rss_mb")
+    if mb is not None and old:
+        if mb > old * (1.0 + rss_threshold) and mb - old > MIN_DELTA_MB:
+            problems.append(
+                f"peak RSS: {old:.1f} → {mb:.1f} MB (+{(mb / old - 1) * 100:.0f}%)"
+            )
+    return problems
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Collage rendering benchmark")
+    ap.add_argument("--template", action="append", type=Path)
+    ap.add_argument("--resolution", action="append", type=_parse_resolution)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--threshold", type=float, default=0.15)
+    ap.add_argument("--rss-threshold", type=float, default=0.10)
+    args = ap.parse_args(argv)
+
+    templates = args.template or DEFAULT_TEMPLATES
+    resolutions = args.resolution or [(2304, 1296)]
+
+    baseline = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+
+    results = {}
+    failed = []
+    for tpl in templates:
+        for res in resolutions:
+            case = f"{Path(tpl).parent.name}@{res[0]}x{res[1]}"
+            with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+                result = pool.submit(run_case, str(tpl), res, args.runs).result()
+            results[case] = result
+
+            print(f"\n== {case}  (median of {args.runs})")
+            for key, ms in result["phases"].items():
+                if key != "total":
+                    print(f"   {key:32s} {ms:9.1f} ms")
+            print(f"   {'total':32s} {result['phases']['total']:9.1f} ms")
+            print(f"   {'peak RSS':32s} {result['peak_rss_mb']:9.1f} MB")
+
+            if case in baseline and not args.update_baseline:
+                problems = compare(result, baseline[case], args.threshold, args.rss_threshold)
+                for p in problems:
+                    print(f"   ⚠️ worse than baseline: {p}")
+                if problems:
+                    failed.append(case)
+
+    if args.update_baseline:
+        baseline.update(results)
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(baseline, indent=2), encoding="utf-8")
+        print(f"\n📝 Baseline written: {args.baseline}")
+    elif not baseline:
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one.")
+
+    if failed:
+        print(f"\n🛑 Regression in: {', '.join(failed)}")
+        return 1
+    print("\n✅ Benchmark finished.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
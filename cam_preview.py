@@ -1,24 +1,54 @@
 #!/usr/bin/env python3
 """
-Standalone camera preview window using your app settings.
+Standalone camera preview window using your app settings, plus a headless
+calibration sweep for the Pi camera.
 
-Run: python cam_preview.py
+Run: python cam_preview.py             (preview window)
+     python cam_preview.py --sweep     (calibration sweep, no window)
 
 Controls:
 - Esc or Q: Quit
 - F: Toggle fullscreen
 
-This uses CameraManager + [camera] settings from app/config.cfg (via user_config).
+This uses the [camera] backend + [camera] settings from app/config.cfg (via user_config).
+
+Sweep:
+Runs CameraManager through every combination of the options below (each
+repeatable; unset = the value from [camera]) and measures, per combination:
+sustained preview FPS, CPU time per preview frame, time until AE/AWB/AF
+settle (and until focus locks), and capture latency. Then it picks the
+fastest capture setup that still keeps the preview at [camera] preview_fps
+and writes it as a [camera] block for this sensor and Pi, ready to paste
+into user_config.cfg.
+
+  --preview-size WxH         lores preview stream size
+  --capture-resolution WxH   still size
+  --capture-mode MODE        switch | stream | zsl (= stream + zsl); default all three
+  --main-format FMT          main stream format, e.g. BGR888, XBGR8888
+  --buffer-count N           camera buffers (0 = Picamera2 default); default 0, 4, 6
+  --af-mode MODE             auto | continuous | manual | off
+  --af-range RANGE           normal | macro | full
+  --camera N                 0 = [camera], 1/2 = [camera1]/[camera2] (default [cameras] capture)
+  --seconds S                preview measuring time per combination (default 5)
+  --shots N                  captures per combination (default 3)
+  --settle-timeout S         longest wait for AE/AWB/AF (default 5)
+  --out PATH                 recommended block (default <cache_path>/camera_<sensor>.cfg);
+                             all measurements go next to it as .json
 """
+import argparse
+import itertools
+import json
+import statistics
 import sys
+import time
 from pathlib import Path
 
 from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QPixmap
 from PySide6.QtWidgets import QApplication, QWidget, QLabel, QVBoxLayout
 
-from app.config import CAMERA_CONFIG
-from app.camera import CameraManager
+from app.config import CACHE_PATH, CAMERA_CONFIG, CAMERAS_SETUP
+from app.camera import ON_PI, CameraManager, camera_settings, create_camera
 
 
 class CameraPreview(QWidget):
@@ -27,7 +57,7 @@ class CameraPreview(QWidget):
         self.setWindowTitle("📷 Camera Preview — Esc to quit, F fullscreen")
         self.setMinimumSize(480, 640)
 
-        self.camera = CameraManager(CAMERA_CONFIG)
+        self.camera = create_camera(CAMERA_CONFIG, CAMERAS_SETUP)
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
@@ -74,8 +104,218 @@ class CameraPreview(QWidget):
         super().closeEvent(event)
 
 
+def _size(s: str) -> tuple[int, int]:
+    w, h = s.lower().split("x")
+    return int(w), int(h)
+
+
+def _pi_model() -> str:
+    try:
+        return Path("/proc/device-tree/model").read_text().strip("\x00 \n")
+    except OSError:
+        return "unknown"
+
+
+def sweep_combos(args, base: dict) -> list[dict]:
+    """Every combination of the sweep options, as [camera] overrides."""
+    axes = {
+        "preview_size": args.preview_size
+        or ([tuple(base["preview_size"])] if base.get("preview_size") else [None]),
+        "capture_resolution": args.capture_resolution
+        or [tuple(base.get("capture_resolution", base.get("resolution", [720, 1280])))],
+        "capture_mode": args.capture_mode or ["switch", "stream", "zsl"],
+        "main_format": args.main_format or [base.get("main_format")],
+        "buffer_count": args.buffer_count or [0, 4, 6],
+        "af_mode": args.af_mode or [base.get("af_mode", "auto")],
+        "af_range": args.af_range or [base.get("af_range", "normal")],
+    }
+    combos = []
+    for values in itertools.product(*axes.values()):
+        combo = dict(zip(axes, values))
+        if combo["capture_mode"] == "zsl":
+            combo["capture_mode"], combo["zsl"] = "stream", True
+        else:
+            combo["zsl"] = False
+        combos.append(combo)
+    return combos
+
+
+def measure(config: dict, combo: dict, args) -> dict:
+    """Start a CameraManager with `combo` and time it. Closes the camera."""
+    cam = CameraManager({**config, **{k: v for k, v in combo.items() if v is not None}})
+    if combo["preview_size"]:
+        cam.set_preview_size(combo["preview_size"])
+    out = {"preview_size": list(cam.preview_size)}
+    try:
+        # settle: AE/AWB/AF via converged(), focus lock from AfState (2 = focused)
+        t0 = time.monotonic()
+        cam.start_camera()
+        out["sensor"] = (cam.picam.camera_properties or {}).get("Model", "unknown")
+        out["settle_ms"] = out["af_ms"] = None
+        while time.monotonic() - t0 < args.settle_timeout:
+            cam.get_preview_array()
+            ms = (time.monotonic() - t0) * 1000.0
+            md = cam._metadata or {}
+            if out["af_ms"] is None and md.get("AfState") == 2:
+                out["af_ms"] = ms
+            if out["settle_ms"] is None and cam.converged():
+                out["settle_ms"] = ms
+            if out["settle_ms"] is not None and (out["af_ms"] is not None or "AfState" not in md):
+                break
+
+        # sustained preview rate, counting only new frames
+        frames, last_ns = 0, None
+        t0, cpu0 = time.monotonic(), time.process_time()
+        while time.monotonic() - t0 < args.seconds:
+            arr, _ = cam.get_preview_array()
+            if arr is None:
+                continue
+            if cam.preview_ns is None or cam.preview_ns != last_ns:
+                frames += 1
+                last_ns = cam.preview_ns
+        elapsed = time.monotonic() - t0
+        cpu = time.process_time() - cpu0
+        out["preview_fps"] = frames / elapsed
+        out["cpu_ms_per_frame"] = cpu * 1000.0 / frames if frames else None
+
+        # capture: trigger -> image in memory, and trigger -> frame exposure
+        grab_ms, frame_ms = [], []
+        for _ in range(args.shots):
+            if combo["zsl"]:
+                cam.zsl_start()
+                time.sleep(1.0)  # a short "countdown" to fill the buffer
+            trigger = time.monotonic_ns()
+            cam.grab(trigger_ns=trigger)
+            grab_ms.append((time.monotonic_ns() - trigger) / 1e6)
+            sensor_ns = (cam.last_capture or {}).get("sensor_ns")
+            if sensor_ns:
+                frame_ms.append((sensor_ns - trigger) / 1e6)
+            cam.zsl_stop()
+        out["grab_ms"] = statistics.median(grab_ms)
+        out["frame_ms"] = statistics.median(frame_ms) if frame_ms else None
+    except Exception as e:
+        out["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        cam.close()
+    return out
+
+
+def shutter_ms(r: dict) -> float:
+    # how far the photo is from the "0": the exposure if we know it,
+    # otherwise the whole grab (an upper bound)
+    return abs(r["frame_ms"]) if r.get("frame_ms") is not None else r["grab_ms"]
+
+
+def recommend(results: list[dict], min_fps: float) -> dict | None:
+    ok = [r for r in results if "error" not in r and r.get("grab_ms") is not None]
+    if not ok:
+        return None
+    smooth = [r for r in ok if r["preview_fps"] >= min_fps * 0.95]
+    if not smooth:
+        print(f"⚠️ Nothing kept the preview at {min_fps:g} fps; picking the smoothest")
+        return max(ok, key=lambda r: r["preview_fps"])
+    return min(
+        smooth,
+        key=lambda r: (
+            round(shutter_ms(r)),
+            r["settle_ms"] if r["settle_ms"] is not None else float("inf"),
+            r["cpu_ms_per_frame"] or 0.0,
+        ),
+    )
+
+
+def camera_block(best: dict, sensor: str, pi: str) -> str:
+    combo = best["combo"]
+    keys = {
+        "capture_mode": combo["capture_mode"],
+        "zsl": combo["zsl"],
+        "capture_resolution": list(combo["capture_resolution"]),
+        "preview_size": best["preview_size"],
+        "main_format": combo["main_format"],
+        "buffer_count": combo["buffer_count"] or None,
+        "af_mode": combo["af_mode"],
+        "af_range": combo["af_range"],
+    }
+    lines = [
+        f"# cam_preview.py --sweep: {sensor} on {pi}, {time.strftime('%Y-%m-%d')}",
+        f"# preview {best['preview_fps']:.1f} fps, shutter {shutter_ms(best):.0f} ms, "
+        f"grab {best['grab_ms']:.0f} ms",
+        "[camera]",
+    ]
+    for key, value in keys.items():
+        if value is None:
+            continue
+        lines.append(f"{key} = {json.dumps(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def run_sweep(args) -> int:
+    if not ON_PI:
+        print("🛑 The calibration sweep needs the Pi camera (Picamera2).")
+        return 1
+    n = args.camera if args.camera is not None else int(CAMERAS_SETUP.get("capture", 0) or 0)
+    config = camera_settings(CAMERA_CONFIG, CAMERAS_SETUP, n)
+    if config is None:
+        return 1
+
+    combos = sweep_combos(args, config)
+    print(f"Sweeping {len(combos)} camera setups (~{args.seconds + 2 * args.shots + 2:.0f} s each)")
+    results = []
+    for i, combo in enumerate(combos, 1):
+        label = ", ".join(f"{k}={v}" for k, v in combo.items() if v is not None)
+        print(f"\n[{i}/{len(combos)}] {label}")
+        r = {"combo": combo, **measure(config, combo, args)}
+        results.append(r)
+        if "error" in r:
+            print(f"   ⚠️ {r['error']}")
+            continue
+        settle = f"{r['settle_ms']:.0f} ms" if r["settle_ms"] is not None else "timeout"
+        af = f"{r['af_ms']:.0f} ms" if r["af_ms"] is not None else "-"
+        frame = f"{r['frame_ms']:+.0f} ms" if r["frame_ms"] is not None else "-"
+        cpu = f"{r['cpu_ms_per_frame']:.1f}" if r["cpu_ms_per_frame"] is not None else "-"
+        print(
+            f"   preview {r['preview_fps']:5.1f} fps, {cpu} ms CPU/frame | "
+            f"settle {settle}, focus {af} | grab {r['grab_ms']:.0f} ms, exposure {frame}"
+        )
+
+    min_fps = float(config.get("preview_fps", 20))
+    best = recommend(results, min_fps)
+    if best is None:
+        print("\n🛑 No setup could capture; nothing to recommend.")
+        return 1
+
+    sensor = next((r["sensor"] for r in results if r.get("sensor")), "unknown")
+    block = camera_block(best, sensor, _pi_model())
+    out = args.out or CACHE_PATH / f"camera_{sensor.replace(' ', '_')}.cfg"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(block, encoding="utf-8")
+    out.with_suffix(".json").write_text(json.dumps(results, indent=2, default=list), encoding="utf-8")
+    print(f"\n{block}")
+    print(f"📝 Recommended [camera] block written: {out}")
+    print("   Merge it into app/user_config.cfg to use it.")
+    return 0
+
+
 def main():
-    app = QApplication(sys.argv)
+    ap = argparse.ArgumentParser(description="Camera preview window / calibration sweep.")
+    ap.add_argument("--sweep", action="store_true")
+    ap.add_argument("--preview-size", action="append", type=_size)
+    ap.add_argument("--capture-resolution", action="append", type=_size)
+    ap.add_argument("--capture-mode", action="append", choices=["switch", "stream", "zsl"])
+    ap.add_argument("--main-format", action="append")
+    ap.add_argument("--buffer-count", action="append", type=int)
+    ap.add_argument("--af-mode", action="append", choices=["auto", "continuous", "manual", "off"])
+    ap.add_argument("--af-range", action="append", choices=["normal", "macro", "full"])
+    ap.add_argument("--camera", type=int)
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--shots", type=int, default=3)
+    ap.add_argument("--settle-timeout", type=float, default=5.0)
+    ap.add_argument("--out", type=Path)
+    args, qt_args = ap.parse_known_args()
+    if args.sweep:
+        sys.exit(run_sweep(args))
+
+    app = QApplication(sys.argv[:1] + qt_args)
     win = CameraPreview()
     win.resize(720, 1280)
     win.show()
@@ -34,6 +34,10 @@ def main():
         app.setStyle(style)
 
     controller = AppController()
+    # let a shot that's still being taken finish
+    app.aboutToQuit.connect(controller.capture_service.stop)
+    app.aboutToQuit.connect(controller.postprocess.stop)
+    app.aboutToQuit.connect(controller.print_event_summary)
     win = controller.widget()
     win.resize(480, 640)
     win.setFixedSize(480, 640)
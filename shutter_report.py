@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Shutter latency report.
+
+Run: python shutter_report.py [PATH ...] [options]
+
+Reads the per-session shutter traces written with [camera] shutter_trace = true
+(<event>/trace/<session>-shutter.jsonl) and prints percentiles for each mark
+measured from the countdown's 0, plus each step from the mark before it.
+A negative sensor_exposure means the frame was exposed before the 0 (ZSL).
+
+PATH is a trace file or a folder of them (default: the loaded event's
+shutter_trace_dir).
+
+Options:
+  --session ID     only this session (repeatable)
+  --mode MODE      only shots taken in this capture mode (zsl, stream, switch, ...)
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from app.config import CAMERA_CONFIG, EVENT_LOADED
+from app.timing import SHOT_MARKS
+
+PERCENTILES = (50, 90, 99)
+
+
+def load_traces(paths: list[Path]) -> list[dict]:
+    files = []
+    for p in paths:
+        files.extend(sorted(p.glob("*-shutter.jsonl")) if p.is_dir() else [p])
+    shots = []
+    for f in files:
+        with f.open(encoding="utf-8") as fh:
+            for n, line in enumerate(fh, 1):
+                if not line.strip():
+                    continue
+                try:
+                    shots.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"⚠️ {f}:{n}: not a trace line, skipped")
+    return shots
+
+
+def _row(name: str, values: list[float]) -> str:
+    if not values:
+        return f"   {name:34s} {'-':>5s}"
+    arr = np.asarray(values)
+    pcts = "".join(f"{v:9.1f}" for v in np.percentile(arr, PERCENTILES))
+    return f"   {name:34s} {len(arr):5d}{pcts}{arr.max():9.1f}"
+
+
+def report(shots: list[dict]) -> None:
+    header = "".join(f"{'p' + str(p):>9s}" for p in PERCENTILES) + f"{'max':>9s}"
+    print(f"\n== from countdown 0 (ms, {len(shots)} shots)")
+    print(f"   {'mark':34s} {'n':>5s}{header}")
+    for mark in SHOT_MARKS[1:]:
+        print(_row(mark, [s["ms"][mark] for s in shots if mark in s.get("ms", {})]))
+
+    # each step runs from the previous mark the shot has (switch mode has
+    # no sensor_exposure, the no-preview path no flash)
+    steps: dict[tuple[str, str], list[float]] = {}
+    for s in shots:
+        present = [m for m in SHOT_MARKS if m in s["marks"]]
+        for prev, mark in zip(present, present[1:]):
+            steps.setdefault((prev, mark), []).append((s["marks"][mark] - s["marks"][prev]) / 1e6)
+    order = {m: i for i, m in enumerate(SHOT_MARKS)}
+    print("\n== steps (ms)")
+    print(f"   {'step':34s} {'n':>5s}{header}")
+    for prev, mark in sorted(steps, key=lambda k: (order[k[1]], order[k[0]])):
+        print(_row(f"{prev} → {mark}", steps[prev, mark]))
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Summarize shutter latency traces.")
+    ap.add_argument("paths", nargs="*", type=Path)
+    ap.add_argument("--session", action="append", default=[])
+    ap.add_argument("--mode", default=None)
+    args = ap.parse_args(argv)
+
+    paths = args.paths or [EVENT_LOADED / CAMERA_CONFIG.get("shutter_trace_dir", "trace")]
+    missing = [p for p in paths if not p.exists()]
+    if missing:
+        print(f"No traces at {', '.join(map(str, missing))} (set [camera] shutter_trace = true)")
+        return 1
+
+    shots = [s for s in load_traces(paths) if "marks" in s]
+    if args.session:
+        shots = [s for s in shots if str(s.get("session_id")) in args.session]
+    if args.mode:
+        shots = [s for s in shots if s.get("mode") == args.mode]
+    if not shots:
+        print("No shots to report.")
+        return 1
+
+    sessions = {s.get("session_id") for s in shots}
+    modes = sorted({str(s.get("mode")) for s in shots})
+    print(f"{len(shots)} shots from {len(sessions)} sessions, capture mode: {', '.join(modes)}")
+    report(shots)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())